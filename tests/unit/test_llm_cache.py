@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the LLM Gateway response cache.
+Tests exact (L1) and semantic (L2) lookups without loading an embedding model.
+"""
+
+import numpy as np
+import pytest
+from typing import Dict
+
+from utils.llm_gateway import LLMCache, LSHIndex
+
+# Tiny fixed vocabulary so "similar" prompts get near-identical vectors
+VECTORS: Dict[str, np.ndarray] = {
+    "What is paging?": np.array([1.0, 0.0, 0.0]),
+    "What is paging ?": np.array([0.99, 0.1, 0.0]),
+    "Explain process scheduling": np.array([0.0, 1.0, 0.0]),
+}
+
+@pytest.fixture
+def cache() -> LLMCache:
+    """Cache with a deterministic fake encoder."""
+    cache = LLMCache(max_size=10)
+    cache._embed = lambda prompt: VECTORS[prompt] / np.linalg.norm(VECTORS[prompt])
+    return cache
+
+def _store(cache: LLMCache, prompt: str, content: str, task: str = "summary") -> str:
+    key = cache.generate_key(prompt, "qwen3:4b", task)
+    cache.set(key, {"content": content})
+    cache.semantic_add(prompt, "qwen3:4b", task, key)
+    return key
+
+def test_exact_hit(cache: LLMCache) -> None:
+    """Identical prompt returns the stored response."""
+    key = _store(cache, "What is paging?", "Paging splits memory into pages.")
+    assert cache.get(key)["content"] == "Paging splits memory into pages."
+
+def test_semantic_hit_for_paraphrase(cache: LLMCache) -> None:
+    """A near-duplicate prompt is served from the semantic tier."""
+    _store(cache, "What is paging?", "Paging splits memory into pages.")
+    hit = cache.semantic_get("What is paging ?", "qwen3:4b", "summary")
+    assert hit is not None
+    assert hit["content"] == "Paging splits memory into pages."
+
+def test_semantic_miss_below_threshold(cache: LLMCache) -> None:
+    """Unrelated prompts do not match."""
+    _store(cache, "What is paging?", "Paging splits memory into pages.")
+    assert cache.semantic_get("Explain process scheduling", "qwen3:4b", "summary") is None
+
+def test_semantic_lookup_is_scoped_per_task(cache: LLMCache) -> None:
+    """Responses cached for one task are never returned for another."""
+    _store(cache, "What is paging?", "Paging splits memory into pages.", task="summary")
+    assert cache.semantic_get("What is paging ?", "qwen3:4b", "quiz_generation") is None
+
+def test_eviction_removes_semantic_entry(cache: LLMCache) -> None:
+    """Evicted entries can no longer be reached through the semantic tier."""
+    cache.max_size = 1
+    _store(cache, "What is paging?", "Paging splits memory into pages.")
+    _store(cache, "Explain process scheduling", "The scheduler picks the next process.")
+    assert cache.semantic_get("What is paging ?", "qwen3:4b", "summary") is None
+
+def test_warm_populates_both_tiers(cache: LLMCache) -> None:
+    """Warm-up caches responses and indexes prompts with one batched encode."""
+    calls = []
+    
+    class FakeEncoder:
+        def encode(self, prompts, **kwargs):
+            calls.append(len(prompts))
+            vectors = np.stack([VECTORS[p] for p in prompts])
+            return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    cache._get_encoder = lambda: FakeEncoder()
+    prompts = ["What is paging?", "Explain process scheduling"]
+    responses = [{"content": "Paging splits memory into pages."}, {"content": "The scheduler picks."}]
+    
+    assert cache.warm(prompts, responses, "qwen3:4b", "summary") == 2
+    assert calls == [2]
+    assert cache.get(cache.generate_key("Explain process scheduling", "qwen3:4b", "summary"))["content"] == "The scheduler picks."
+    assert cache.semantic_get("What is paging ?", "qwen3:4b", "summary")["content"] == "Paging splits memory into pages."
+
+def test_persistent_cache_survives_restart(tmp_path) -> None:
+    """Entries written to disk are served by a fresh cache instance."""
+    pytest.importorskip("diskcache")
+    pytest.importorskip("lz4")
+    
+    first = LLMCache(persist_dir=str(tmp_path))
+    key = first.generate_key("What is paging?", "qwen3:4b", "summary")
+    first.set(key, {"content": "Paging splits memory into pages."})
+    first.disk.close()
+    
+    second = LLMCache(persist_dir=str(tmp_path))
+    assert second.get(key) == {"content": "Paging splits memory into pages."}
+    assert key in second.cache
+
+def test_lsh_index_finds_near_duplicate() -> None:
+    """LSH lookup returns a near-duplicate among many random vectors."""
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((2000, 384)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    index = LSHIndex(dim=384)
+    for i, vector in enumerate(vectors):
+        index.add(f"key_{i}", vector)
+    
+    query = vectors[123] + 0.01 * rng.standard_normal(384).astype(np.float32)
+    query /= np.linalg.norm(query)
+    key, score = index.search(query)
+    assert key == "key_123"
+    assert score > 0.95
+    
+    index.remove("key_123")
+    match = index.search(query)
+    assert match is None or match[0] != "key_123"
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Unit tests for LLMGateway generation, caching and failure handling.
+Uses a fake provider and encoder, so no model server is needed.
+"""
+
+import asyncio
+import dataclasses
+import json
+import time
+
+import numpy as np
+import pytest
+
+from utils import llm_gateway
+from utils.llm_gateway import (
+    LLMCache, LLMGateway, LLMProviderAdapter, TaskType, _BatchQueue, _get_ollama_http_client
+)
+
+TEMPLATE = "Summarize the following content for an operating systems course: "
+
+class FakeProvider(LLMProviderAdapter):
+    """Provider that answers every prompt by echoing it, except prompts listed in `failing`."""
+    
+    def __init__(self):
+        self.calls = []
+        self.failing = set()
+    
+    def is_available(self) -> bool:
+        return True
+    
+    def generate(self, prompt, model_config, prefix=None, **kwargs):
+        self.calls.append(prompt)
+        if prompt in self.failing:
+            raise ValueError(f"bad prompt: {prompt}")
+        return {"content": f"answer: {prompt}", "model": model_config.name, "provider": "ollama", "cost": 0.0}
+
+@pytest.fixture
+def gateway() -> LLMGateway:
+    """Gateway with an in-memory cache and the fake provider behind every Ollama model."""
+    gateway = LLMGateway()
+    gateway.cache = LLMCache(max_size=10)
+    gateway._providers["ollama"] = FakeProvider()
+    return gateway
+
+def test_generate_serves_repeat_prompt_from_cache(gateway: LLMGateway) -> None:
+    """A repeated prompt is answered from L1 with the original metadata."""
+    first = gateway.generate(TaskType.SUMMARY, TEMPLATE + "paging")
+    second = gateway.generate(TaskType.SUMMARY, TEMPLATE + "paging")
+    
+    assert first["cache_status"] == "MISS"
+    assert second["cache_status"] == "HIT-L1"
+    assert second["content"] == first["content"]
+    assert second["model_used"] == "qwen3:4b" and second["cost"] == 0.0
+    assert len(gateway._providers["ollama"].calls) == 1
+
+def test_encoder_failure_does_not_fail_generation(gateway: LLMGateway) -> None:
+    """A broken embedding model is logged; the response is still returned and the provider stays up."""
+    def broken_encoder(prompt):
+        raise OSError("cannot load all-MiniLM-L6-v2 offline")
+    gateway.cache._embed = broken_encoder
+    
+    response = gateway.generate(TaskType.SUMMARY, TEMPLATE + "paging", use_semantic_cache=True)
+    assert response["content"] == f"answer: {TEMPLATE}paging"
+    assert gateway._providers["ollama"].check_available()
+    
+    response = asyncio.run(gateway.agenerate(TaskType.SUMMARY, TEMPLATE + "scheduling", use_semantic_cache=True))
+    assert response["content"] == f"answer: {TEMPLATE}scheduling"
+
+def test_semantic_cache_is_opt_in(gateway: LLMGateway) -> None:
+    """Prompts sharing a template never get each other's answers unless semantic lookup is requested."""
+    # Every prompt looks identical to the encoder, like two short queries behind one long template
+    gateway.cache._embed = lambda prompt: np.array([1.0, 0.0, 0.0])
+    gateway.generate(TaskType.SUMMARY, TEMPLATE + "paging", use_semantic_cache=True)
+    
+    response = gateway.generate(TaskType.SUMMARY, TEMPLATE + "deadlock")
+    assert response["cache_status"] == "MISS"
+    assert response["content"] == f"answer: {TEMPLATE}deadlock"
+    
+    response = gateway.generate(TaskType.SUMMARY, TEMPLATE + "threads", use_semantic_cache=True)
+    assert response["cache_status"] == "HIT-L2"
+
+def test_agenerate_returns_each_callers_response(gateway: LLMGateway) -> None:
+    """Concurrent async calls are batched but each caller gets its own answer."""
+    queries = ["paging", "scheduling", "deadlock"]
+    
+    async def run():
+        return await asyncio.gather(*(gateway.agenerate(TaskType.SUMMARY, TEMPLATE + q) for q in queries))
+    
+    responses = asyncio.run(run())
+    assert [r["content"] for r in responses] == [f"answer: {TEMPLATE}{q}" for q in queries]
+    assert all(r["model_used"] == "qwen3:4b" for r in responses)
+
+def test_failing_prompt_only_fails_its_own_caller(gateway: LLMGateway) -> None:
+    """One bad prompt in a coalesced batch does not fail the other callers."""
+    gateway._providers["ollama"].failing.add(TEMPLATE + "bad")
+    queries = ["paging", "bad", "deadlock"]
+    
+    async def run():
+        return await asyncio.gather(
+            *(gateway.agenerate(TaskType.SUMMARY, TEMPLATE + q) for q in queries),
+            return_exceptions=True
+        )
+    
+    paging, bad, deadlock = asyncio.run(run())
+    assert isinstance(bad, ValueError)
+    assert paging["content"] == f"answer: {TEMPLATE}paging"
+    assert deadlock["content"] == f"answer: {TEMPLATE}deadlock"
+
+def test_lone_request_is_not_held_for_the_batch_window(gateway: LLMGateway) -> None:
+    """With nothing else queued a request is sent without waiting for more."""
+    model_config = gateway.task_router.model_registry.get_model("qwen3:4b")
+    
+    async def run():
+        batch_queue = _BatchQueue(gateway._providers["ollama"], model_config, max_wait_ms=5000)
+        start = time.monotonic()
+        response = await batch_queue.submit("paging")
+        return response, time.monotonic() - start
+    
+    response, elapsed = asyncio.run(run())
+    assert response["content"] == "answer: paging"
+    assert elapsed < 1.0
+
+def test_warmed_entries_carry_response_metadata(gateway: LLMGateway) -> None:
+    """Warmed cache hits have the fields agents read from a generated response."""
+    gateway.cache._get_encoder = lambda: None
+    gateway.warm_cache([{"task_type": "summary", "prompt": TEMPLATE + "paging", "response": "Pages are fixed-size."}])
+    
+    response = gateway.generate(TaskType.SUMMARY, TEMPLATE + "paging")
+    assert response["cache_status"] == "HIT-L1"
+    assert response["content"] == "Pages are fixed-size."
+    assert response["model_used"] == "qwen3:4b" and response["cost"] == 0.0
+    assert gateway._providers["ollama"].calls == []
+
+def test_ollama_http_client_is_per_event_loop() -> None:
+    """Each event loop gets its own client; one loop reuses its client."""
+    pytest.importorskip("httpx")
+    
+    async def get_clients():
+        return _get_ollama_http_client(), _get_ollama_http_client()
+    
+    loops = [asyncio.new_event_loop(), asyncio.new_event_loop()]
+    try:
+        first, again = loops[0].run_until_complete(get_clients())
+        second, _ = loops[1].run_until_complete(get_clients())
+    finally:
+        for loop in loops:
+            loop.close()
+    assert first is again
+    assert second is not first
+
+def test_request_errors_do_not_open_the_circuit(gateway: LLMGateway) -> None:
+    """A bad prompt fails only its own request; the provider keeps serving others."""
+    gateway._providers["ollama"].failing.add(TEMPLATE + "bad")
+    with pytest.raises(ValueError):
+        gateway.generate(TaskType.SUMMARY, TEMPLATE + "bad")
+    
+    assert gateway.generate(TaskType.SUMMARY, TEMPLATE + "paging")["cache_status"] == "MISS"
+
+def test_connection_errors_open_the_circuit_only_with_a_fallback(gateway: LLMGateway) -> None:
+    """The last provider for a model is never marked down; timeouts never open the circuit."""
+    provider = gateway._providers["ollama"]
+    model_config = gateway.task_router.model_registry.get_model("qwen3:4b")
+    with_fallback = dataclasses.replace(model_config, fallback_to="gpt-4o-mini")
+    
+    gateway._record_provider_failure(provider, model_config, ConnectionError("connection refused"))
+    gateway._record_provider_failure(provider, with_fallback, TimeoutError("read timed out"))
+    assert provider.check_available()
+    
+    gateway._record_provider_failure(provider, with_fallback, ConnectionError("connection refused"))
+    assert not provider.check_available()
+
+def test_streamed_response_is_cached_with_metadata(gateway: LLMGateway) -> None:
+    """A completed stream is cached with the fields agents read, and replayed on the next call."""
+    async def collect():
+        return "".join([chunk async for chunk in gateway.stream(TaskType.SUMMARY, TEMPLATE + "paging")])
+    
+    assert asyncio.run(collect()) == f"answer: {TEMPLATE}paging"
+    
+    response = gateway.generate(TaskType.SUMMARY, TEMPLATE + "paging")
+    assert response["cache_status"] == "HIT-L1"
+    assert response["model_used"] == "qwen3:4b" and response["cost"] == 0.0
+    assert len(gateway._providers["ollama"].calls) == 1
+
+def test_routing_configs_are_frozen(gateway: LLMGateway) -> None:
+    """Configs cannot change under the select_model memo."""
+    model_config = gateway.task_router.select_model(TaskType.SUMMARY)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        model_config.latency_ms = 1_000_000
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        gateway.task_router.task_configs[TaskType.SUMMARY].max_latency_ms = 1
+
+def test_registry_lookups_do_not_expose_the_index(gateway: LLMGateway) -> None:
+    """Changing a returned list leaves the registry index intact."""
+    registry = gateway.task_router.model_registry
+    registry.get_models_by_capability("reasoning").clear()
+    registry.get_models_by_privacy("local").clear()
+    
+    assert [m.name for m in registry.get_models_by_capability("reasoning")] == ["qwen3:4b"]
+    assert [m.name for m in registry.get_models_by_privacy("local")] == ["qwen3:4b"]
+
+def test_disk_cache_is_opt_in(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Responses stay in memory unless persistence is enabled; the directory is under the project root."""
+    assert LLMGateway().cache.disk is None
+    
+    settings = {"llm.persist_cache": True, "paths.llm_cache": "./cache/llm"}
+    monkeypatch.setattr(llm_gateway.config, "get", lambda key, default=None: settings.get(key, default))
+    assert llm_gateway._llm_cache_dir() == str(llm_gateway.PROJECT_ROOT / "cache" / "llm")
+
+def test_ollama_requests_keep_the_model_loaded_without_overrides(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Sync and async Ollama payloads carry keep_alive and the client temperature, with or without a prefix."""
+    pytest.importorskip("langchain_ollama")
+    httpx = pytest.importorskip("httpx")
+    from langchain_core.messages import HumanMessage
+    
+    adapter = llm_gateway.OllamaAdapter()
+    model_config = LLMGateway().task_router.model_registry.get_model("qwen3:4b")
+    
+    sync_payload = adapter._get_client(model_config.name)._chat_params([HumanMessage(TEMPLATE + "paging")])
+    assert sync_payload["keep_alive"] == llm_gateway.OLLAMA_KEEP_ALIVE
+    assert sync_payload["options"] == {"temperature": llm_gateway.OLLAMA_TEMPERATURE}
+    
+    sent = []
+    def handler(request):
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json={"response": "ok", "prompt_eval_count": 3, "eval_count": 1})
+    
+    async def run():
+        client = httpx.AsyncClient(base_url=llm_gateway.OLLAMA_BASE_URL, transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(llm_gateway, "_get_ollama_http_client", lambda: client)
+        try:
+            await adapter.agenerate(TEMPLATE + "paging", model_config, prefix=TEMPLATE)
+            await adapter.agenerate("paging", model_config)
+        finally:
+            await client.aclose()
+    
+    asyncio.run(run())
+    for payload in sent:
+        assert payload["keep_alive"] == llm_gateway.OLLAMA_KEEP_ALIVE
+        assert payload["options"] == {"temperature": llm_gateway.OLLAMA_TEMPERATURE}
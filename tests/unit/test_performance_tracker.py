@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the bounded PerformanceTracker metric buffers.
+"""
+
+import pytest
+
+from utils.logging import PerformanceTracker
+
+def test_window_is_bounded_but_aggregates_are_lifetime() -> None:
+    """Old samples fall out of the window while count/sum/min/max keep every sample."""
+    tracker = PerformanceTracker(window_size=5)
+    for value in range(10):
+        tracker.record_metric("latency", float(value), "ms")
+    
+    buffer = tracker.metrics["latency"]
+    assert [sample[0] for sample in buffer.samples] == [5.0, 6.0, 7.0, 8.0, 9.0]
+    
+    latency = tracker.get_metric_stats()["latency"]
+    assert latency["count"] == 10
+    assert latency["sum"] == 45.0
+    assert latency["min"] == 0.0
+    assert latency["max"] == 9.0
+    assert latency["p50"] == pytest.approx(7.0)
+
+def test_summary_keeps_per_sample_entries() -> None:
+    """The summary lists retained samples oldest first, in the original entry shape."""
+    tracker = PerformanceTracker(window_size=5)
+    tracker.record_metric("latency", 120.0, "ms", service="course_mapper")
+    tracker.record_metric("tokens", 42.0)
+    tracker.record_metric("latency", 80.0, "ms")
+    
+    summary = tracker.get_performance_summary()
+    assert summary["total_metrics"] == 3
+    assert [(m["metric"], m["value"]) for m in summary["metrics"]] == [
+        ("latency", 120.0), ("tokens", 42.0), ("latency", 80.0)
+    ]
+    first = summary["metrics"][0]
+    assert first["unit"] == "ms" and first["tags"] == {"service": "course_mapper"}
+    assert set(first) == {"metric", "value", "unit", "timestamp", "tags"}
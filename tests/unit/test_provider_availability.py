@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Unit tests for cached provider availability with circuit-breaker backoff.
+"""
+
+from utils.llm_gateway import AVAILABILITY_TTL, LLMProviderAdapter
+
+class FlakyAdapter(LLMProviderAdapter):
+    """Adapter whose availability is toggled by the test and counts probes."""
+    
+    def __init__(self):
+        self.up = True
+        self.probes = 0
+    
+    def is_available(self) -> bool:
+        self.probes += 1
+        return self.up
+    
+    def generate(self, prompt, model_config, **kwargs):
+        raise NotImplementedError
+
+def test_probe_is_cached_until_forced() -> None:
+    """Repeated checks reuse the probe result; force re-probes."""
+    adapter = FlakyAdapter()
+    assert adapter.check_available() and adapter.check_available()
+    assert adapter.probes == 1
+    
+    adapter.up = False
+    assert adapter.check_available(force=True) is False
+    assert adapter.probes == 2
+
+def test_failures_back_off_exponentially() -> None:
+    """Each consecutive failure doubles the wait before the next probe."""
+    adapter = FlakyAdapter()
+    adapter.mark_unavailable()
+    assert adapter.check_available() is False
+    assert adapter.probes == 0
+    assert adapter._unavailable_backoff == 2 * AVAILABILITY_TTL
+    
+    adapter.mark_unavailable()
+    assert adapter._unavailable_backoff == 4 * AVAILABILITY_TTL
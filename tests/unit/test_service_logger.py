@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Unit tests for ServiceLogger structured context.
+"""
+
+import logging
+
+import pytest
+
+from utils.logging import ServiceLogger, _dumps_context, _percentiles
+
+def test_context_reaches_ancestor_handlers_and_never_raises(tmp_path, monkeypatch) -> None:
+    """Unusual keys/values are serialized into the message seen by root handlers."""
+    monkeypatch.setattr("utils.logging.config.get", lambda key, default=None: str(tmp_path))
+    messages = []
+    
+    class Capture(logging.Handler):
+        def emit(self, record):
+            messages.append(record.getMessage())
+    
+    handler = Capture()
+    logging.getLogger().addHandler(handler)
+    try:
+        ServiceLogger("context_test").info("Counted", counts={1: 2}, total=10**30)
+    finally:
+        logging.getLogger().removeHandler(handler)
+    
+    assert messages == ['Counted | {"counts": {"1": 2}, "total": 1000000000000000000000000000000}']
+
+def test_fallbacks_without_optional_packages(monkeypatch) -> None:
+    """Context serialization and percentiles work without orjson and numpy."""
+    monkeypatch.setattr("utils.logging.ORJSON_AVAILABLE", False)
+    monkeypatch.setattr("utils.logging.NUMPY_AVAILABLE", False)
+    
+    assert _dumps_context({"stage": "facd", 1: 2}) == '{"stage": "facd", "1": 2}'
+    assert _percentiles([4.0, 1.0, 3.0, 2.0], [0, 50, 95, 100]) == pytest.approx([1.0, 2.5, 3.85, 4.0])
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Unit tests for UnifiedStateManager subsystem extraction and merging.
+"""
+
+import json
+import pickle
+import threading
+
+import pytest
+
+from utils import unified_state_manager
+from utils.unified_state_manager import (
+    ContentState, ServiceStatus, SubsystemType, UnifiedStateManager, UnifiedStateRecord, get_status_counts,
+    snapshot_history, validate_unified_state
+)
+
+def test_content_view_round_trip() -> None:
+    """Slotted content view carries subsystem fields and merges back into the state."""
+    manager = UnifiedStateManager()
+    state = manager.create_initial_state("session-1", course_id="OSN", faculty_id="F1")
+    
+    view = manager.get_subsystem_view(state, SubsystemType.CONTENT)
+    assert isinstance(view, ContentState)
+    assert not hasattr(view, "__dict__")
+    assert view.course_id == "OSN"
+    assert pickle.loads(pickle.dumps(view)) == view
+    
+    view.es_index = "course_osn"
+    merged = manager.merge_subsystem_state(state, SubsystemType.CONTENT, view)
+    assert merged["es_index"] == "course_osn"
+    assert merged["faculty_id"] == "F1"
+
+def test_service_records_gather_state_dicts() -> None:
+    """Service records combine the plain service dicts, which stay JSON-serializable."""
+    manager = UnifiedStateManager()
+    state = manager.create_initial_state("session-1")
+    
+    manager.update_service_status(state, "course_mapper", ServiceStatus.COMPLETED, result={"los": 3})
+    state["service_errors"]["kli_application"] = "timeout"
+    
+    assert state["service_statuses"] == {"course_mapper": ServiceStatus.COMPLETED}
+    records = manager.get_service_records(state)
+    assert records["course_mapper"].result == {"los": 3}
+    assert records["kli_application"].status is None and records["kli_application"].error == "timeout"
+    assert json.loads(json.dumps(state["service_statuses"])) == {"course_mapper": "completed"}
+
+def test_initial_states_share_no_containers() -> None:
+    """Each new state gets its own lists and dicts."""
+    manager = UnifiedStateManager()
+    first = manager.create_initial_state("session-1", course_id="OSN")
+    first["chunks"].append({"content": "paging"})
+    
+    second = manager.create_initial_state("session-2")
+    assert second["session_id"] == "session-2"
+    assert "course_id" not in second
+    assert second["chunks"] == [] and second["chunks"] is not first["chunks"]
+    assert first["session_id"] == "session-1" and first["course_id"] == "OSN"
+
+def test_validation_result_is_dict_compatible() -> None:
+    """Each validation returns its own result; dict-style access still works."""
+    manager = UnifiedStateManager()
+    state = manager.create_initial_state("session-1", facd_approved=True)
+    
+    first = manager.validate_state(state)
+    assert first["valid"] is True and first.get("valid") is True
+    assert "valid" in first and "state_validated" not in first
+    assert first.inconsistent_fields == ["facd_approved=True but no facd data"]
+    assert json.loads(json.dumps(validate_unified_state(state))) == first.to_dict()
+    
+    state["facd"] = {"learning_objectives": ["LO_001"]}
+    second = manager.validate_state(state)
+    assert second is not first
+    assert second.inconsistent_fields == []
+    assert first.inconsistent_fields == ["facd_approved=True but no facd data"]
+
+def test_approval_checks_follow_python_truthiness() -> None:
+    """Any empty facd container counts as missing data for an approved stage."""
+    manager = UnifiedStateManager()
+    for empty in (None, {}, [], (), set(), 0.0, ""):
+        state = manager.create_initial_state("session-1", facd_approved=True, facd=empty)
+        assert validate_unified_state(state)["inconsistent_fields"] == ["facd_approved=True but no facd data"]
+    
+    state = manager.create_initial_state("session-1", facd_approved=True, facd=("LO_001",))
+    assert validate_unified_state(state)["inconsistent_fields"] == []
+
+def test_subsystem_state_sees_direct_writes() -> None:
+    """Extraction reflects writes made straight to the state and can be modified by the caller."""
+    manager = UnifiedStateManager()
+    state = manager.create_initial_state("session-1", course_id="c1")
+    
+    first = manager.get_subsystem_state(state, SubsystemType.CONTENT)
+    assert type(first) is dict and first["course_id"] == "c1"
+    first["course_id"] = "c3"
+    assert state["course_id"] == "c1"
+    
+    state["course_id"] = "c2"
+    assert manager.get_subsystem_state(state, SubsystemType.CONTENT)["course_id"] == "c2"
+
+def test_status_counts_from_history() -> None:
+    """Per-service status counts match the recorded status changes."""
+    manager = UnifiedStateManager()
+    state = manager.create_initial_state("session-1")
+    for status in (ServiceStatus.IN_PROGRESS, ServiceStatus.ERROR, ServiceStatus.IN_PROGRESS, ServiceStatus.COMPLETED):
+        manager.update_service_status(state, "course_mapper", status)
+    manager.update_service_status(state, "kli_application", ServiceStatus.SKIPPED)
+    
+    assert get_status_counts(state) == {
+        "course_mapper": {"in_progress": 2, "error": 1, "completed": 1},
+        "kli_application": {"skipped": 1},
+    }
+    
+    legacy = {"execution_history": snapshot_history(state)}
+    assert get_status_counts(legacy) == get_status_counts(state)
+
+def test_state_round_trips_through_json(monkeypatch) -> None:
+    """A state with service updates stays JSON-serializable and its history is bounded."""
+    monkeypatch.setattr(unified_state_manager, "EXECUTION_HISTORY_SIZE", 3)
+    manager = UnifiedStateManager()
+    state = manager.create_initial_state("session-1", course_id="OSN")
+    for i in range(5):
+        manager.update_service_status(state, f"service_{i}", ServiceStatus.COMPLETED, result={"n": i})
+    
+    assert type(state["execution_history"]) is list
+    assert [entry["service_id"] for entry in state["execution_history"]] == ["service_2", "service_3", "service_4"]
+    
+    restored = json.loads(json.dumps(state))
+    assert restored["execution_history"] == json.loads(json.dumps(snapshot_history(state)))
+    assert restored["service_results"]["service_4"] == {"n": 4}
+    assert get_status_counts(restored) == get_status_counts(state)
+
+def test_state_record_supports_attribute_and_dict_access() -> None:
+    """Slotted state records validate and update like the state dict."""
+    manager = UnifiedStateManager()
+    record = manager.create_state_record("session-1", course_id="OSN", facd_approved=True)
+    
+    assert isinstance(record, UnifiedStateRecord)
+    assert not hasattr(record, "__dict__")
+    assert record.course_id == record["course_id"] == "OSN"
+    assert "learner_id" not in record and record.get("learner_id", "none") == "none"
+    
+    result = manager.validate_state(record)
+    assert result.inconsistent_fields == ["facd_approved=True but no facd data"]
+    assert record.state_validated is True
+    
+    manager.update_service_status(record, "course_mapper", ServiceStatus.COMPLETED)
+    assert dict(record.service_statuses) == {"course_mapper": ServiceStatus.COMPLETED}
+    assert manager.validate_state(record.to_dict()).to_dict() == result.to_dict()
+
+def test_state_record_accepts_non_schema_keys() -> None:
+    """Merging and bridging into a record behave as they do for a state dict."""
+    manager = UnifiedStateManager()
+    record = manager.create_state_record("session-1", course_id="OSN")
+    
+    sme = manager.get_subsystem_state(record, SubsystemType.SME)
+    sme["review_status"] = "pending"
+    manager.merge_subsystem_state(record, SubsystemType.SME, sme)
+    assert record["review_assignments"] == [] and record.review_status == "pending"
+    
+    manager.bridge_from_agent_state({"result": "done", "course_id": "OSN-2"}, record)
+    assert record["result"] == "done" and "result" in record
+    assert record.course_id == "OSN-2"
+    assert record.to_dict()["result"] == "done"
+    
+    assert record.get("update", "none") == "none" and "update" not in record
+    with pytest.raises(KeyError):
+        record["to_dict"]
+
+def test_concurrent_service_updates_are_not_lost() -> None:
+    """Updates from many threads against one state all land in the history."""
+    manager = UnifiedStateManager()
+    state = manager.create_initial_state("session-1")
+    
+    def worker(n: int) -> None:
+        for i in range(200):
+            manager.update_service_status(state, f"service_{n}_{i % 5}", ServiceStatus.COMPLETED)
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(state["execution_history"]) == 1600
+    assert len(state["service_statuses"]) == 40
+    assert sum(counts["completed"] for counts in get_status_counts(state).values()) == 1600
+
+def test_state_locks_are_per_state() -> None:
+    """Each live state has its own lock, dropped once no thread holds it."""
+    manager = UnifiedStateManager()
+    first = manager.create_initial_state("session-1")
+    second = manager.create_initial_state("session-2")
+    
+    lock = unified_state_manager._state_lock(first)
+    with lock:
+        assert unified_state_manager._state_lock(first) is lock
+        assert unified_state_manager._state_lock(second) is not lock
+    del lock
+    assert id(first) not in unified_state_manager._state_locks
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the knowledge graph viewer.
+Tests the overview report against a stub driver and the Cypher
+display formatting against a live Neo4j instance when one is available.
+"""
+
+import pytest
+
+from tools import view_knowledge_graph as viewer
+
+OVERVIEW = {
+    "node_counts": [{"labels": ["LearningObjective"], "count": 2}],
+    "relationship_counts": [{"type": "DECOMPOSED_INTO", "count": 1}],
+    "learning_objectives": ["[Graphs, Trees]: No description"],
+    "knowledge_components": [],
+    "learning_processes": [],
+    "instruction_methods": [],
+    "sample_relationships": ["LearningObjective '[Graphs, Trees]' DECOMPOSED_INTO KnowledgeComponent 'None'"],
+    "learning_chains": [],
+    "learning_trees": [],
+    "courses": [{"course": "Data Structures", "id": "DS101", "lo_count": 2}],
+}
+
+class _StubResult:
+    def single(self):
+        return OVERVIEW
+
+class _StubSession:
+    def __init__(self):
+        self.queries = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def run(self, query):
+        self.queries.append(query)
+        return _StubResult()
+
+class _StubDriver:
+    def __init__(self):
+        self.session_ = _StubSession()
+    
+    def session(self, **kwargs):
+        return self.session_
+
+def test_overview_report_from_stub_driver(monkeypatch, capsys) -> None:
+    """The report renders every section from the single overview record."""
+    driver = _StubDriver()
+    monkeypatch.setattr(viewer, "_get_driver", lambda: driver)
+    
+    viewer.view_knowledge_graph()
+    out = capsys.readouterr().out
+    
+    assert driver.session_.queries == [viewer.KG_OVERVIEW_QUERY]
+    assert "LearningObjective: 2" in out
+    assert "  - [Graphs, Trees]: No description" in out
+    assert "Course: Data Structures (ID: DS101)" in out
+    assert "Error accessing Neo4j" not in out
+
+def test_overview_never_uses_bare_tostring() -> None:
+    """toString() raises on list properties; only toStringOrNull() is safe."""
+    assert "toString(" not in viewer.KG_OVERVIEW_CYPHER
+    assert "toStringOrNull(" in viewer.KG_OVERVIEW_CYPHER
+
+def test_display_expression_on_neo4j() -> None:
+    """Scalars, lists and missing values all render as display strings."""
+    try:
+        driver = viewer._get_driver()
+        driver.verify_connectivity()
+    except Exception as e:
+        pytest.skip(f"Neo4j not available: {e}")
+    
+    cypher = f"RETURN {viewer._display('$value', 'Unnamed')} AS text"
+    cases = [("Graphs", "Graphs"), (3, "3"), (["Graphs", "Trees"], "[Graphs, Trees]"), (None, "Unnamed")]
+    with driver.session() as session:
+        for value, expected in cases:
+            assert session.run(cypher, value=value).single()["text"] == expected
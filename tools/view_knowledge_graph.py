@@ -5,142 +5,223 @@ Knowledge Graph Viewer - Shows the structure of the generated knowledge graph
 
 import sys
 import os
+import io
+import atexit
+import threading
 from pathlib import Path
 
 # Add project root to path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, Query, READ_ACCESS
 from utils.database_connections import get_database_manager
 
+def _display(expr: str, default: str) -> str:
+    """Cypher expression rendering a property value as a display string.
+    
+    Properties may hold lists, which toString() rejects, so scalars go
+    through toStringOrNull() and lists are joined element by element.
+    
+    Args:
+        expr: Cypher expression for the property, e.g. ``lo.name``
+        default: Text to show when the property is missing
+        
+    Returns:
+        Cypher expression that always evaluates to a string
+    """
+    return (
+        f"CASE WHEN {expr} IS NULL THEN '{default}' "
+        f"WHEN toStringOrNull({expr}) IS NOT NULL THEN toStringOrNull({expr}) "
+        f"ELSE '[' + substring(reduce(s = '', i IN {expr} | "
+        f"s + ', ' + coalesce(toStringOrNull(i), 'None')), 2) + ']' END"
+    )
+
+def _sample_nodes(label: str, var: str, alias: str, short: str) -> str:
+    """CALL subquery collecting "name: description" lines for three nodes."""
+    return f"""
+CALL {{
+    MATCH ({var}:{label})
+    WITH {var} LIMIT 3
+    RETURN collect({_display(f'{var}.name', f'Unnamed {short}')} + ': ' +
+                   {_display(f'{var}.description', 'No description')}) AS {alias}
+}}"""
+
+# All sections of the overview in one round trip: each CALL subquery
+# aggregates to a single row, so the result is exactly one record.
+# Sample lines are formatted server-side so only display strings cross Bolt.
+KG_OVERVIEW_CYPHER = """
+CALL {
+    MATCH (n)
+    WITH labels(n) AS labels, count(n) AS count
+    ORDER BY count DESC
+    RETURN collect({labels: labels, count: count}) AS node_counts
+}
+CALL {
+    MATCH ()-[r]->()
+    WITH type(r) AS type, count(r) AS count
+    ORDER BY count DESC
+    RETURN collect({type: type, count: count}) AS relationship_counts
+}""" + _sample_nodes("LearningObjective", "lo", "learning_objectives", "LO") \
+    + _sample_nodes("KnowledgeComponent", "kc", "knowledge_components", "KC") \
+    + _sample_nodes("LearningProcess", "lp", "learning_processes", "LP") \
+    + _sample_nodes("InstructionMethod", "im", "instruction_methods", "IM") + f"""
+CALL {{
+    MATCH (a)-[r]->(b)
+    WITH a, r, b LIMIT 5
+    RETURN collect(coalesce(labels(a)[0], 'None') + " '" + {_display('a.name', 'None')} + "' " + type(r) + ' ' +
+                   coalesce(labels(b)[0], 'None') + " '" + {_display('b.name', 'None')} + "'") AS sample_relationships
+}}""" + """
+CALL {
+    MATCH path = (c:Course)-[:HAS_LEARNING_OBJECTIVE]->(lo:LearningObjective)
+                 -[:DECOMPOSED_INTO]->(kc:KnowledgeComponent)
+                 -[:REQUIRES]->(lp:LearningProcess)
+                 -[:BEST_SUPPORTED_BY]->(im:InstructionMethod)
+    WITH c, lo, kc, lp, im LIMIT 3
+    RETURN collect({course: c.name, lo: lo.name, kc: kc.name,
+                    lp: lp.name, im: im.name}) AS learning_chains
+}
+CALL {
+    MATCH (l:Learner)-[:HAS_PLT]->(plt:PersonalizedLearningTree)
+    WITH l, plt LIMIT 3
+    RETURN collect({learner: l.name, plt: plt.name,
+                    description: plt.description}) AS learning_trees
+}
+CALL {
+    MATCH (c:Course)
+    OPTIONAL MATCH (c)-[:HAS_LEARNING_OBJECTIVE]->(lo:LearningObjective)
+    WITH c, count(lo) as lo_count
+    LIMIT 5
+    RETURN collect({course: c.name, id: c.id, lo_count: lo_count}) AS courses
+}
+RETURN node_counts, relationship_counts,
+       learning_objectives, knowledge_components, learning_processes, instruction_methods,
+       sample_relationships, learning_chains, learning_trees, courses
+"""
+
+# Server-side limit for the overview (seconds); repeated monitoring calls
+# reuse the same Query object and hit the server's cached plan
+KG_QUERY_TIMEOUT = 30.0
+KG_OVERVIEW_QUERY = Query(KG_OVERVIEW_CYPHER, timeout=KG_QUERY_TIMEOUT)
+
+# Buffered report output is written to stdout whenever it reaches this size
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+_driver = None
+_driver_lock = threading.Lock()
+
+def _get_driver():
+    """Get the Neo4j driver, connecting once and reusing its connection pool."""
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                # Connect to Neo4j using the database manager
+                _driver = get_database_manager().get_neo4j_driver()
+                atexit.register(_driver.close)
+    return _driver
+
+def _flush_output(buf: io.StringIO) -> None:
+    """Write the buffered report to stdout in one call and reset the buffer."""
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
+    buf.seek(0)
+    buf.truncate()
+
 def view_knowledge_graph():
     """Display the complete knowledge graph structure."""
     
-    # Connect to Neo4j using the database manager
-    db_manager = get_database_manager()
-    driver = db_manager.get_neo4j_driver()
+    # Build the report in memory and write it out in large chunks
+    buf = io.StringIO()
+    
+    def emit(text: str = "") -> None:
+        buf.write(text)
+        buf.write("\n")
+        if buf.tell() >= OUTPUT_CHUNK_SIZE:
+            _flush_output(buf)
     
     try:
-        with driver.session() as session:
-            print("🧠 KNOWLEDGE GRAPH STRUCTURE")
-            print("=" * 60)
+        driver = _get_driver()
+        # Read-only report: route to a reader in a cluster
+        with driver.session(default_access_mode=READ_ACCESS) as session:
+            overview = session.run(KG_OVERVIEW_QUERY).single()
+            
+            emit("🧠 KNOWLEDGE GRAPH STRUCTURE")
+            emit("=" * 60)
             
             # Get all nodes with their types
-            print("\n📊 NODE COUNTS BY TYPE:")
-            print("-" * 30)
-            result = session.run("MATCH (n) RETURN labels(n) as labels, count(n) as count ORDER BY count DESC")
-            for record in result:
-                labels = record["labels"]
-                count = record["count"]
-                print(f"{', '.join(labels)}: {count}")
+            emit("\n📊 NODE COUNTS BY TYPE:")
+            emit("-" * 30)
+            for row in overview["node_counts"]:
+                emit(f"{', '.join(row['labels'])}: {row['count']}")
             
             # Get all relationship types
-            print("\n🔗 RELATIONSHIP COUNTS BY TYPE:")
-            print("-" * 30)
-            result = session.run("MATCH ()-[r]->() RETURN type(r) as type, count(r) as count ORDER BY count DESC")
-            for record in result:
-                rel_type = record["type"]
-                count = record["count"]
-                print(f"{rel_type}: {count}")
+            emit("\n🔗 RELATIONSHIP COUNTS BY TYPE:")
+            emit("-" * 30)
+            for row in overview["relationship_counts"]:
+                emit(f"{row['type']}: {row['count']}")
             
             # Sample nodes of different types
-            print("\n📌 SAMPLE NODES:")
-            print("-" * 30)
+            emit("\n📌 SAMPLE NODES:")
+            emit("-" * 30)
             
             # Learning Objectives
-            print("\nLearning Objectives (LOs):")
-            result = session.run("MATCH (lo:LearningObjective) RETURN lo LIMIT 3")
-            for record in result:
-                lo = record["lo"]
-                print(f"  - {lo.get('name', 'Unnamed LO')}: {lo.get('description', 'No description')}")
+            emit("\nLearning Objectives (LOs):")
+            for line in overview["learning_objectives"]:
+                emit(f"  - {line}")
             
             # Knowledge Components
-            print("\nKnowledge Components (KCs):")
-            result = session.run("MATCH (kc:KnowledgeComponent) RETURN kc LIMIT 3")
-            for record in result:
-                kc = record["kc"]
-                print(f"  - {kc.get('name', 'Unnamed KC')}: {kc.get('description', 'No description')}")
+            emit("\nKnowledge Components (KCs):")
+            for line in overview["knowledge_components"]:
+                emit(f"  - {line}")
             
             # Learning Processes
-            print("\nLearning Processes (LPs):")
-            result = session.run("MATCH (lp:LearningProcess) RETURN lp LIMIT 3")
-            for record in result:
-                lp = record["lp"]
-                print(f"  - {lp.get('name', 'Unnamed LP')}: {lp.get('description', 'No description')}")
+            emit("\nLearning Processes (LPs):")
+            for line in overview["learning_processes"]:
+                emit(f"  - {line}")
             
             # Instruction Methods
-            print("\nInstruction Methods (IMs):")
-            result = session.run("MATCH (im:InstructionMethod) RETURN im LIMIT 3")
-            for record in result:
-                im = record["im"]
-                print(f"  - {im.get('name', 'Unnamed IM')}: {im.get('description', 'No description')}")
+            emit("\nInstruction Methods (IMs):")
+            for line in overview["instruction_methods"]:
+                emit(f"  - {line}")
             
             # Sample relationships
-            print("\n🔄 SAMPLE RELATIONSHIPS:")
-            print("-" * 30)
-            result = session.run("""
-                MATCH (a)-[r]->(b)
-                RETURN labels(a)[0] as a_type, a.name as a_name, 
-                       type(r) as rel_type, 
-                       labels(b)[0] as b_type, b.name as b_name
-                LIMIT 5
-            """)
-            for record in result:
-                print(f"  - {record['a_type']} '{record['a_name']}' {record['rel_type']} {record['b_type']} '{record['b_name']}'")
+            emit("\n🔄 SAMPLE RELATIONSHIPS:")
+            emit("-" * 30)
+            for line in overview["sample_relationships"]:
+                emit(f"  - {line}")
             
             # Complete learning chains
-            print("\n⛓️ COMPLETE LEARNING CHAINS:")
-            print("-" * 30)
-            result = session.run("""
-                MATCH path = (c:Course)-[:HAS_LEARNING_OBJECTIVE]->(lo:LearningObjective)
-                             -[:DECOMPOSED_INTO]->(kc:KnowledgeComponent)
-                             -[:REQUIRES]->(lp:LearningProcess)
-                             -[:BEST_SUPPORTED_BY]->(im:InstructionMethod)
-                RETURN c.name as course, lo.name as lo, kc.name as kc, 
-                       lp.name as lp, im.name as im
-                LIMIT 3
-            """)
-            for record in result:
-                print(f"Course: {record['course']}")
-                print(f"  LO: {record['lo']}")
-                print(f"    KC: {record['kc']}")
-                print(f"      LP: {record['lp']}")
-                print(f"        IM: {record['im']}")
-                print()
+            emit("\n⛓️ COMPLETE LEARNING CHAINS:")
+            emit("-" * 30)
+            for row in overview["learning_chains"]:
+                emit(f"Course: {row['course']}")
+                emit(f"  LO: {row['lo']}")
+                emit(f"    KC: {row['kc']}")
+                emit(f"      LP: {row['lp']}")
+                emit(f"        IM: {row['im']}")
+                emit()
             
             # Personalized learning trees
-            print("\n🌳 PERSONALIZED LEARNING TREES:")
-            print("-" * 30)
-            result = session.run("""
-                MATCH (l:Learner)-[:HAS_PLT]->(plt:PersonalizedLearningTree)
-                RETURN l.name as learner, plt.name as plt, plt.description as description
-                LIMIT 3
-            """)
-            for record in result:
-                print(f"Learner: {record['learner']}")
-                print(f"  PLT: {record['plt']}")
-                print(f"  Description: {record['description']}")
-                print()
+            emit("\n🌳 PERSONALIZED LEARNING TREES:")
+            emit("-" * 30)
+            for row in overview["learning_trees"]:
+                emit(f"Learner: {row['learner']}")
+                emit(f"  PLT: {row['plt']}")
+                emit(f"  Description: {row['description']}")
+                emit()
             
             # Course knowledge graphs
-            print("\n📚 COURSE KNOWLEDGE GRAPHS:")
-            print("-" * 30)
-            result = session.run("""
-                MATCH (c:Course)
-                OPTIONAL MATCH (c)-[:HAS_LEARNING_OBJECTIVE]->(lo:LearningObjective)
-                WITH c, count(lo) as lo_count
-                RETURN c.name as course, c.id as id, lo_count
-                LIMIT 5
-            """)
-            for record in result:
-                print(f"Course: {record['course']} (ID: {record['id']})")
-                print(f"  Learning Objectives: {record['lo_count']}")
-                print()
+            emit("\n📚 COURSE KNOWLEDGE GRAPHS:")
+            emit("-" * 30)
+            for row in overview["courses"]:
+                emit(f"Course: {row['course']} (ID: {row['id']})")
+                emit(f"  Learning Objectives: {row['lo_count']}")
+                emit()
                 
     except Exception as e:
-        print(f"❌ Error accessing Neo4j: {e}")
+        emit(f"❌ Error accessing Neo4j: {e}")
     finally:
-        driver.close()
+        _flush_output(buf)
 
 if __name__ == "__main__":
-    view_knowledge_graph() 
\ No newline at end of file
+    view_knowledge_graph() 
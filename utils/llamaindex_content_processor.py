@@ -9,23 +9,52 @@ Target Index: course_docs_ostep_2025
 
 import os
 import logging
-from typing import Dict, Any, List, Optional
+import queue
+import threading
+from typing import Dict, Any, Iterator, List, Optional
 from pathlib import Path
 from datetime import datetime
 
+import numpy as np
+import orjson
+import requests
+import torch
+from elasticsearch import Elasticsearch, helpers
 from llama_index.core import (
     Document, 
-    VectorStoreIndex, 
-    Settings,
-    StorageContext
+    Settings
 )
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from llama_index.vector_stores.elasticsearch import ElasticsearchStore
 from llama_index.core.node_parser import SentenceSplitter
-from llama_index.core.schema import TextNode
+from llama_index.core.schema import MetadataMode, TextNode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
 
 logger = logging.getLogger(__name__)
 
+# all-MiniLM-L6-v2 embedding dimension
+EMBEDDING_DIMS = 384
+
+# Ingest pipeline tuning: nodes per batch and batches buffered between stages
+NODE_BATCH_SIZE = 256
+PIPELINE_QUEUE_SIZE = 4
+BULK_CHUNK_SIZE = 500
+KNN_NUM_CANDIDATES = 64
+
+# Same mapping ElasticsearchStore creates (content and metadata are mapped dynamically)
+INDEX_MAPPINGS = {
+    "properties": {
+        "embedding": {
+            "type": "dense_vector",
+            "dims": EMBEDDING_DIMS,
+            "index": True,
+            "similarity": "cosine"
+        }
+    }
+}
+
+_END_OF_STREAM = object()
+
 class LlamaIndexContentProcessor:
     """
     LlamaIndex-based content processor aligned with SME subsystem.
@@ -41,7 +70,8 @@ class LlamaIndexContentProcessor:
                  es_host: str = "localhost",
                  es_port: int = 9200,
                  index_name: str = "course_docs_ostep_2025",
-                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"):
+                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 compile_embeddings: bool = False):
         """
         Initialize LlamaIndex content processor.
         
@@ -50,16 +80,20 @@ class LlamaIndexContentProcessor:
             es_port: Elasticsearch port
             index_name: Target Elasticsearch index
             embedding_model: HuggingFace embedding model
+            compile_embeddings: Compile the encoder with torch.compile (pays a one-off
+                compile and warm-up cost here; worth it only for long ingest runs)
         """
         self.es_host = es_host
         self.es_port = es_port
         self.index_name = index_name
         self.embedding_model = embedding_model
+        self.compile_embeddings = compile_embeddings
         
         # Initialize components
         self._setup_embeddings()
         self._setup_elasticsearch()
         self._setup_node_parser()
+        self._setup_http()
         
         logger.info(f"Initialized LlamaIndex processor for index: {index_name}")
     
@@ -70,23 +104,66 @@ class LlamaIndexContentProcessor:
                 model_name=self.embedding_model
             )
             Settings.embed_model = self.embed_model
+            
+            # Inference only: disable dropout for every forward pass
+            self.embed_model._model.eval()
+            
+            if self.compile_embeddings:
+                self._compile_embedding_model()
             logger.info(f"Embeddings initialized: {self.embedding_model}")
         except Exception as e:
             logger.error(f"Failed to initialize embeddings: {e}")
             raise
     
+    def _compile_embedding_model(self):
+        """Compile the transformer encoder and warm it up; falls back to eager mode on failure."""
+        if not hasattr(torch, "compile"):
+            logger.info("torch.compile not available, using eager embedding model")
+            return
+        
+        transformer = self.embed_model._model[0]
+        eager_model = transformer.auto_model
+        try:
+            transformer.auto_model = torch.compile(eager_model, mode="reduce-overhead", dynamic=True)
+            
+            # Compilation is lazy: trigger graph capture before the first real batch
+            with torch.inference_mode():
+                self.embed_model._model.encode(["warmup"] * 2)
+            logger.info("Embedding model compiled with torch.compile")
+        except Exception as e:
+            transformer.auto_model = eager_model
+            logger.warning(f"torch.compile failed, using eager embedding model: {e}")
+    
     def _setup_elasticsearch(self):
-        """Setup Elasticsearch vector store."""
+        """Setup Elasticsearch client (no request is made until the first write)."""
         try:
-            self.vector_store = ElasticsearchStore(
+            self.es_client = Elasticsearch(f"http://{self.es_host}:{self.es_port}")
+            self._index_ready = False
+            self._vector_store = None
+            logger.info(f"Elasticsearch client initialized: {self.es_host}:{self.es_port}")
+        except Exception as e:
+            logger.error(f"Failed to initialize Elasticsearch client: {e}")
+            raise
+    
+    @property
+    def vector_store(self) -> ElasticsearchStore:
+        """LlamaIndex store over the target index, created on first use."""
+        if self._vector_store is None:
+            self._vector_store = ElasticsearchStore(
                 es_url=f"http://{self.es_host}:{self.es_port}",
                 index_name=self.index_name,
-                dims=384  # all-MiniLM-L6-v2 embedding dimension
+                dims=EMBEDDING_DIMS
             )
-            logger.info(f"Elasticsearch store initialized: {self.es_host}:{self.es_port}")
-        except Exception as e:
-            logger.error(f"Failed to initialize Elasticsearch store: {e}")
-            raise
+        return self._vector_store
+    
+    def _ensure_index(self):
+        """Create the target index with a dense-vector mapping if it does not exist yet."""
+        if self._index_ready:
+            return
+        if not self.es_client.indices.exists(index=self.index_name):
+            self.es_client.indices.create(index=self.index_name, mappings=INDEX_MAPPINGS)
+            logger.info(f"Created Elasticsearch index: {self.index_name}")
+        self._index_ready = True
     
     def _setup_node_parser(self):
         """Setup node parser for chunking."""
@@ -97,6 +174,11 @@ class LlamaIndexContentProcessor:
         )
         logger.info("Node parser initialized")
     
+    def _setup_http(self):
+        """Setup a pooled HTTP session for direct Elasticsearch queries."""
+        self._http = requests.Session()
+        self._http.headers.update({"Content-Type": "application/json"})
+    
     def process_pdf(self, file_path: str, course_id: str = None) -> Dict[str, Any]:
         """
         Process PDF document using LlamaIndex pipeline.
@@ -114,29 +196,14 @@ class LlamaIndexContentProcessor:
             # Load document
             documents = self._load_documents(file_path)
             
-            # Parse into nodes
-            nodes = self._parse_nodes(documents, course_id)
-            
-            # Create vector store index
-            storage_context = StorageContext.from_defaults(
-                vector_store=self.vector_store
-            )
-            
-            # Build index
-            index = VectorStoreIndex(
-                nodes,
-                storage_context=storage_context,
-                embed_model=self.embed_model
-            )
-            
-            # Store in Elasticsearch
-            self._store_in_elasticsearch(nodes, course_id)
+            # Parse, embed and store nodes as overlapping pipeline stages
+            chunks_processed = self._ingest_nodes(documents, course_id)
             
             result = {
                 "status": "success",
                 "file_path": file_path,
                 "course_id": course_id,
-                "chunks_processed": len(nodes),
+                "chunks_processed": chunks_processed,
                 "index_name": self.index_name,
                 "embedding_model": self.embedding_model,
                 "processing_info": {
@@ -147,7 +214,7 @@ class LlamaIndexContentProcessor:
                 }
             }
             
-            logger.info(f"PDF processing completed: {len(nodes)} chunks")
+            logger.info(f"PDF processing completed: {chunks_processed} chunks")
             return result
             
         except Exception as e:
@@ -182,9 +249,11 @@ class LlamaIndexContentProcessor:
             logger.error(f"Failed to load documents: {e}")
             raise
     
-    def _parse_nodes(self, documents: List[Document], course_id: str = None) -> List[TextNode]:
-        """Parse documents into nodes with metadata."""
-        nodes = []
+    def _parse_nodes(self, documents: List[Document], course_id: str = None) -> Iterator[List[TextNode]]:
+        """Parse documents into nodes with metadata, yielding fixed-size batches."""
+        batch = []
+        total = 0
+        processed_at = datetime.now().isoformat()
         
         for doc in documents:
             # Parse document into nodes
@@ -198,45 +267,180 @@ class LlamaIndexContentProcessor:
                     "file_path": doc.metadata.get("file_path", ""),
                     "chunk_index": i,
                     "processor": "llamaindex",
-                    "processed_at": datetime.now().isoformat()
+                    "processed_at": processed_at
                 })
-                nodes.append(node)
+                batch.append(node)
+                
+                if len(batch) >= NODE_BATCH_SIZE:
+                    total += len(batch)
+                    yield batch
+                    batch = []
+        
+        if batch:
+            total += len(batch)
+            yield batch
+        
+        logger.info(f"Parsed {total} nodes from {len(documents)} documents")
+    
+    def _embed_nodes(self, nodes: List[TextNode]):
+        """Compute L2-normalized embeddings for a batch of nodes in place."""
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
         
-        logger.info(f"Parsed {len(nodes)} nodes from {len(documents)} documents")
-        return nodes
+        # Encode the whole batch straight to a matrix and normalize it in one
+        # vectorized pass instead of per vector
+        with torch.inference_mode():
+            embeddings = self.embed_model._model.encode(
+                texts,
+                batch_size=self.embed_model.embed_batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=False
+            )
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+        
+        for node, embedding in zip(nodes, embeddings.tolist()):
+            node.embedding = embedding
+    
+    def _ingest_nodes(self, documents: List[Document], course_id: str = None) -> int:
+        """
+        Parse, embed and store nodes with the three stages running concurrently.
+        
+        A parser thread feeds node batches to an embedding thread through a
+        bounded queue, which in turn feeds the calling thread that writes to
+        Elasticsearch. Only a few batches are held in memory at any time.
+        
+        Args:
+            documents: Loaded documents
+            course_id: Course identifier for metadata
+            
+        Returns:
+            Number of nodes stored
+        """
+        parsed = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        embedded = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        stop = threading.Event()
+        errors = []
+        
+        def parse_stage():
+            try:
+                for batch in self._parse_nodes(documents, course_id):
+                    if stop.is_set():
+                        break
+                    parsed.put(batch)
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                parsed.put(_END_OF_STREAM)
+        
+        def embed_stage():
+            try:
+                while True:
+                    batch = parsed.get()
+                    if batch is _END_OF_STREAM:
+                        break
+                    # Keep draining after a failure so the parser never blocks
+                    if stop.is_set():
+                        continue
+                    try:
+                        self._embed_nodes(batch)
+                    except Exception as e:
+                        errors.append(e)
+                        stop.set()
+                        continue
+                    embedded.put(batch)
+            finally:
+                embedded.put(_END_OF_STREAM)
+        
+        workers = [
+            threading.Thread(target=parse_stage, name="llamaindex-parse", daemon=True),
+            threading.Thread(target=embed_stage, name="llamaindex-embed", daemon=True)
+        ]
+        for worker in workers:
+            worker.start()
+        
+        stored = 0
+        try:
+            while True:
+                batch = embedded.get()
+                if batch is _END_OF_STREAM:
+                    break
+                if stop.is_set():
+                    continue
+                try:
+                    self._store_in_elasticsearch(batch, course_id)
+                except Exception as e:
+                    errors.append(e)
+                    stop.set()
+                    continue
+                stored += len(batch)
+        finally:
+            for worker in workers:
+                worker.join()
+        
+        if errors:
+            raise errors[0]
+        
+        if stored:
+            # Make the new chunks searchable once, instead of refreshing per bulk request
+            self.es_client.indices.refresh(index=self.index_name)
+        
+        return stored
     
     def _store_in_elasticsearch(self, nodes: List[TextNode], course_id: str = None):
-        """Store nodes in Elasticsearch."""
+        """Bulk-index embedded nodes in the document shape ElasticsearchStore reads back."""
         try:
-            # The vector store will handle the storage
-            # This is done automatically when creating the VectorStoreIndex
-            logger.info(f"Stored {len(nodes)} nodes in Elasticsearch index: {self.index_name}")
+            self._ensure_index()
+            actions = (
+                {
+                    "_index": self.index_name,
+                    "_id": node.node_id,
+                    "_source": {
+                        "content": node.get_content(metadata_mode=MetadataMode.NONE),
+                        # Serialized node (_node_content etc.) so the store can rebuild it
+                        "metadata": node_to_metadata_dict(node, remove_text=True),
+                        "embedding": node.embedding
+                    }
+                }
+                for node in nodes
+            )
+            helpers.bulk(self.es_client, actions, chunk_size=BULK_CHUNK_SIZE)
+            logger.debug(f"Stored {len(nodes)} nodes in Elasticsearch index: {self.index_name}")
             
         except Exception as e:
             logger.error(f"Failed to store in Elasticsearch: {e}")
             raise
     
-    def query_content(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def query_content(self, query: str, top_k: int = 5, use_knn: bool = False) -> List[Dict[str, Any]]:
         """
-        Query content from Elasticsearch using vector similarity.
+        Query content from Elasticsearch.
         
         Args:
             query: Search query
             top_k: Number of results to return
+            use_knn: Rank by embedding similarity (kNN) instead of text match
             
         Returns:
             List of relevant chunks
         """
         try:
             # Use direct Elasticsearch query instead of LlamaIndex retriever
-            import requests
-            
             # If query is empty, get all documents
             if not query.strip():
                 search_body = {
                     "query": {"match_all": {}},
                     "size": top_k
                 }
+            elif use_knn:
+                # Approximate nearest-neighbour search over the embedding field
+                search_body = {
+                    "knn": {
+                        "field": "embedding",
+                        "query_vector": self.embed_model.get_query_embedding(query),
+                        "k": top_k,
+                        "num_candidates": max(KNN_NUM_CANDIDATES, top_k)
+                    },
+                    "size": top_k
+                }
             else:
                 # Use text search
                 search_body = {
@@ -250,10 +454,10 @@ class LlamaIndexContentProcessor:
                 }
             
             url = f"http://{self.es_host}:{self.es_port}/{self.index_name}/_search"
-            response = requests.post(url, json=search_body)
+            response = self._http.post(url, data=orjson.dumps(search_body))
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 results = []
                 for hit in data['hits']['hits']:
                     source = hit['_source']
@@ -274,13 +478,11 @@ class LlamaIndexContentProcessor:
     def get_index_stats(self) -> Dict[str, Any]:
         """Get statistics about the Elasticsearch index."""
         try:
-            import requests
-            
             url = f"http://{self.es_host}:{self.es_port}/{self.index_name}/_count"
-            response = requests.get(url)
+            response = self._http.get(url)
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 return {
                     "index_name": self.index_name,
                     "document_count": data.get("count", 0),
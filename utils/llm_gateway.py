@@ -15,12 +15,29 @@ import os
 import logging as log
 import json
 import hashlib
-from typing import Dict, Any, List, Optional, Literal, Union
+import functools
+import re
+from typing import Dict, Any, List, Optional, Literal, Tuple, Union, AsyncIterator
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+from collections import defaultdict, OrderedDict
 from enum import Enum
 import time
+import asyncio
+import threading
+import argparse
+import atexit
+import weakref
 from abc import ABC, abstractmethod
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.loader import config
 
 # LLM provider imports
 try:
@@ -44,6 +61,43 @@ except ImportError:
     OLLAMA_AVAILABLE = False
     log.warning("Ollama client not available. Install with: pip install langchain-ollama")
 
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    log.warning("httpx not available, async Ollama calls disabled. Install with: pip install httpx")
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+    log.warning("h2 not available, provider HTTP calls use HTTP/1.1. Install with: pip install 'httpx[http2]'")
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+    log.warning("sentence-transformers not available, semantic caching disabled. Install with: pip install sentence-transformers")
+
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+    log.warning("blake3 not available, using hashlib for cache keys. Install with: pip install blake3")
+
+try:
+    import diskcache
+    import lz4.frame
+    import orjson
+    DISK_CACHE_AVAILABLE = True
+except ImportError:
+    DISK_CACHE_AVAILABLE = False
+    log.warning("Persistent LLM cache not available. Install with: pip install diskcache lz4 orjson")
+
 logger = log.getLogger(__name__)
 
 # ===============================
@@ -67,7 +121,7 @@ class TaskType(Enum):
 # MODEL CONFIGURATIONS
 # ===============================
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ModelConfig:
     """Configuration for an LLM model."""
     name: str
@@ -98,24 +152,34 @@ class ModelRegistry:
                 fallback_to=None
             ),
         }
+        self._build_indexes()
+    
+    def _build_indexes(self):
+        """Precompute capability and privacy lookups over the registered models."""
+        self._by_capability: Dict[str, List[ModelConfig]] = defaultdict(list)
+        self._by_privacy: Dict[str, List[ModelConfig]] = defaultdict(list)
+        for model in self.models.values():
+            for capability in model.capabilities:
+                self._by_capability[capability].append(model)
+            self._by_privacy[model.privacy_level].append(model)
     
     def get_model(self, name: str) -> Optional[ModelConfig]:
         """Get model configuration by name."""
         return self.models.get(name)
     
     def get_models_by_capability(self, capability: str) -> List[ModelConfig]:
-        """Get models that support a specific capability."""
-        return [model for model in self.models.values() if capability in model.capabilities]
+        """Get models that support a specific capability (a new list; the index is not exposed)."""
+        return list(self._by_capability.get(capability, ()))
     
     def get_models_by_privacy(self, privacy_level: str) -> List[ModelConfig]:
-        """Get models by privacy level."""
-        return [model for model in self.models.values() if model.privacy_level == privacy_level]
+        """Get models by privacy level (a new list; the index is not exposed)."""
+        return list(self._by_privacy.get(privacy_level, ()))
 
 # ===============================
 # TASK ROUTING CONFIGURATIONS
 # ===============================
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TaskRoutingConfig:
     """Configuration for task-based model routing."""
     task_type: TaskType
@@ -234,15 +298,36 @@ class TaskRouter:
                 response_format={"type": "object", "properties": {"plt": {"type": "object"}}}
             ),
         }
+        
+        # Resolve each task's preferred models once, keeping preference order
+        self._candidates: Dict[TaskType, List[ModelConfig]] = {
+            task: [
+                model for model in map(self.model_registry.get_model, config.preferred_models)
+                if model is not None
+            ]
+            for task, config in self.task_configs.items()
+        }
+        self._select_model_cached = functools.lru_cache(maxsize=1024)(
+            lambda task_type, constraint_items: self._select_model(task_type, dict(constraint_items))
+        )
     
     def select_model(self, task_type: TaskType, constraints: Dict[str, Any] = None) -> Optional[ModelConfig]:
         """Select the best model for a given task and constraints."""
+        constraints = constraints or {}
+        try:
+            constraint_items = frozenset(constraints.items())
+        except TypeError:
+            # Unhashable constraint values cannot be memoized
+            return self._select_model(task_type, constraints)
+        return self._select_model_cached(task_type, constraint_items)
+    
+    def _select_model(self, task_type: TaskType, constraints: Dict[str, Any]) -> Optional[ModelConfig]:
+        """Evaluate constraints against a task's candidate models."""
         if task_type not in self.task_configs:
             logger.error(f"Unknown task type: {task_type}")
             return None
         
         config = self.task_configs[task_type]
-        constraints = constraints or {}
         
         # Apply constraints
         max_cost = constraints.get('max_cost', config.max_cost_per_request)
@@ -250,11 +335,10 @@ class TaskRouter:
         privacy = constraints.get('privacy_requirement', config.privacy_requirement)
         
         # Filter models by constraints
-        available_models = []
-        for model_name in config.preferred_models:
-            model = self.model_registry.get_model(model_name)
-            if model and self._meets_constraints(model, max_cost, max_latency, privacy):
-                available_models.append(model)
+        available_models = [
+            model for model in self._candidates[task_type]
+            if self._meets_constraints(model, max_cost, max_latency, privacy)
+        ]
         
         if not available_models:
             logger.warning(f"No models available for task {task_type} with constraints {constraints}")
@@ -280,18 +364,131 @@ class TaskRouter:
 # LLM PROVIDER ADAPTERS
 # ===============================
 
+AVAILABILITY_TTL = 5.0  # seconds a successful availability probe is trusted
+AVAILABILITY_MAX_BACKOFF = 60.0  # longest wait before re-probing a failing provider
+
+# Failures that mean the provider itself is unreachable. Timeouts of a single
+# request and request errors (bad prompt, rate limits, ...) do not qualify.
+_CONNECTION_ERRORS: Tuple[type, ...] = (ConnectionError,)
+_REQUEST_TIMEOUT_ERRORS: Tuple[type, ...] = (TimeoutError,)
+if HTTPX_AVAILABLE:
+    _CONNECTION_ERRORS += (httpx.NetworkError, httpx.ConnectTimeout)
+if OPENAI_AVAILABLE:
+    import openai
+    _CONNECTION_ERRORS += (openai.APIConnectionError,)
+    _REQUEST_TIMEOUT_ERRORS += (openai.APITimeoutError,)
+if ANTHROPIC_AVAILABLE:
+    _CONNECTION_ERRORS += (anthropic.APIConnectionError,)
+    _REQUEST_TIMEOUT_ERRORS += (anthropic.APITimeoutError,)
+
+def _is_connection_error(error: BaseException) -> bool:
+    """Whether a provider call failed because the provider could not be reached."""
+    for exc in (error, error.__cause__):
+        if isinstance(exc, _CONNECTION_ERRORS) and not isinstance(exc, _REQUEST_TIMEOUT_ERRORS):
+            return True
+    return False
+
 class LLMProviderAdapter(ABC):
     """Abstract base class for LLM provider adapters."""
     
+    # Availability circuit breaker state (class defaults, overwritten per instance)
+    _available: bool = False
+    _availability_expiry: float = 0.0
+    _unavailable_backoff: float = AVAILABILITY_TTL
+    
     @abstractmethod
-    def generate(self, prompt: str, model_config: ModelConfig, **kwargs) -> Dict[str, Any]:
-        """Generate response from LLM."""
+    def generate(self, prompt: str, model_config: ModelConfig, prefix: Optional[str] = None,
+                 **kwargs) -> Dict[str, Any]:
+        """
+        Generate response from LLM.
+        
+        `prefix` is the leading part of `prompt` shared with other requests;
+        providers that support it can keep that part cached between calls.
+        """
         pass
     
+    async def agenerate(self, prompt: str, model_config: ModelConfig, prefix: Optional[str] = None,
+                        **kwargs) -> Dict[str, Any]:
+        """Generate response without blocking the event loop (runs `generate` in a worker thread)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.generate(prompt, model_config, prefix=prefix, **kwargs))
+    
+    async def agenerate_batch(self, prompts: List[str], model_config: ModelConfig,
+                              prefix: Optional[str] = None, return_exceptions: bool = False,
+                              **kwargs) -> List[Any]:
+        """
+        Generate responses for several prompts concurrently.
+        
+        With `return_exceptions` a failing prompt yields its exception in place
+        of a response instead of failing the whole batch.
+        """
+        return await asyncio.gather(
+            *(self.agenerate(prompt, model_config, prefix=prefix, **kwargs) for prompt in prompts),
+            return_exceptions=return_exceptions
+        )
+    
+    async def astream(self, prompt: str, model_config: ModelConfig, prefix: Optional[str] = None,
+                      **kwargs) -> AsyncIterator[str]:
+        """Stream response text chunks (providers without streaming yield one chunk)."""
+        response = await self.agenerate(prompt, model_config, prefix=prefix, **kwargs)
+        yield response["content"]
+    
     @abstractmethod
     def is_available(self) -> bool:
         """Check if provider is available."""
         pass
+    
+    def check_available(self, force: bool = False) -> bool:
+        """
+        Cached `is_available` with circuit-breaker backoff.
+        
+        A healthy result is reused for AVAILABILITY_TTL seconds. Each consecutive
+        failure doubles the time before the next probe, up to AVAILABILITY_MAX_BACKOFF.
+        
+        Args:
+            force: Probe the provider even if a cached result is still valid
+            
+        Returns:
+            Whether the provider is available
+        """
+        now = time.monotonic()
+        if force or now >= self._availability_expiry:
+            self._record_availability(self.is_available(), now)
+        return self._available
+    
+    def mark_unavailable(self):
+        """Open the circuit after a failed call so requests skip straight to fallbacks."""
+        self._record_availability(False, time.monotonic())
+    
+    def _record_availability(self, available: bool, now: float):
+        """Store a probe result and schedule the next probe."""
+        if available:
+            self._unavailable_backoff = AVAILABILITY_TTL
+            self._availability_expiry = now + AVAILABILITY_TTL
+        else:
+            self._availability_expiry = now + self._unavailable_backoff
+            self._unavailable_backoff = min(self._unavailable_backoff * 2, AVAILABILITY_MAX_BACKOFF)
+        self._available = available
+
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_TIMEOUT = 60.0
+
+_provider_http_client = None
+
+def _get_provider_http_client() -> Optional["httpx.Client"]:
+    """Get the pooled keep-alive HTTP client shared by the hosted provider SDKs."""
+    global _provider_http_client
+    if _provider_http_client is None and HTTPX_AVAILABLE:
+        _provider_http_client = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=HTTP_TIMEOUT
+        )
+    return _provider_http_client
 
 class OpenAIAdapter(LLMProviderAdapter):
     """Adapter for OpenAI models."""
@@ -301,12 +498,14 @@ class OpenAIAdapter(LLMProviderAdapter):
         if OPENAI_AVAILABLE:
             api_key = os.getenv('OPENAI_API_KEY')
             if api_key:
-                self.client = OpenAI(api_key=api_key)
+                self.client = OpenAI(api_key=api_key, http_client=_get_provider_http_client())
     
     def is_available(self) -> bool:
         return self.client is not None
     
-    def generate(self, prompt: str, model_config: ModelConfig, **kwargs) -> Dict[str, Any]:
+    def generate(self, prompt: str, model_config: ModelConfig, prefix: Optional[str] = None,
+                 **kwargs) -> Dict[str, Any]:
+        # OpenAI caches repeated prompt prefixes server-side, so `prefix` needs no handling
         if not self.is_available():
             raise RuntimeError("OpenAI client not available")
         
@@ -342,21 +541,30 @@ class AnthropicAdapter(LLMProviderAdapter):
         if ANTHROPIC_AVAILABLE:
             api_key = os.getenv('ANTHROPIC_API_KEY')
             if api_key:
-                self.client = anthropic.Anthropic(api_key=api_key)
+                self.client = anthropic.Anthropic(api_key=api_key, http_client=_get_provider_http_client())
     
     def is_available(self) -> bool:
         return self.client is not None
     
-    def generate(self, prompt: str, model_config: ModelConfig, **kwargs) -> Dict[str, Any]:
+    def generate(self, prompt: str, model_config: ModelConfig, prefix: Optional[str] = None,
+                 **kwargs) -> Dict[str, Any]:
         if not self.is_available():
             raise RuntimeError("Anthropic client not available")
         
+        # Mark the shared prefix as a prompt-cache breakpoint
+        content: Union[str, List[Dict[str, Any]]] = prompt
+        if prefix and prompt.startswith(prefix) and len(prompt) > len(prefix):
+            content = [
+                {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": prompt[len(prefix):]}
+            ]
+        
         try:
             response = self.client.messages.create(
                 model=model_config.name,
                 max_tokens=model_config.max_tokens,
                 temperature=model_config.temperature,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[{"role": "user", "content": content}],
                 **kwargs
             )
             
@@ -374,40 +582,92 @@ class AnthropicAdapter(LLMProviderAdapter):
             logger.error(f"Anthropic generation failed: {e}")
             raise
 
+OLLAMA_BASE_URL = "http://localhost:11434"  # default Ollama port
+OLLAMA_MAX_CONNECTIONS = 16
+OLLAMA_TEMPERATURE = 0.3
+# Ollama reuses the KV cache of a shared prompt prefix only while the model
+# stays loaded, so every client asks for the model to stay resident this long
+OLLAMA_KEEP_ALIVE = "10m"
+
+# httpx.AsyncClient connections belong to the event loop that opened them, so
+# each running loop gets its own client (dropped together with its loop)
+_ollama_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_ollama_http_clients_lock = threading.Lock()
+
+def _get_ollama_http_client() -> "httpx.AsyncClient":
+    """Get the running event loop's async HTTP client for concurrent Ollama requests."""
+    loop = asyncio.get_running_loop()
+    client = _ollama_http_clients.get(loop)
+    if client is None or client.is_closed:
+        with _ollama_http_clients_lock:
+            client = _ollama_http_clients.get(loop)
+            if client is None or client.is_closed:
+                # Local plain-HTTP endpoint: no TLS or HTTP/2, but keep connections alive
+                client = _ollama_http_clients[loop] = httpx.AsyncClient(
+                    base_url=OLLAMA_BASE_URL,
+                    limits=httpx.Limits(
+                        max_connections=OLLAMA_MAX_CONNECTIONS,
+                        max_keepalive_connections=OLLAMA_MAX_CONNECTIONS
+                    ),
+                    timeout=None
+                )
+    return client
+
+def _close_http_clients():
+    """Close the shared HTTP clients at interpreter exit."""
+    if _provider_http_client is not None:
+        _provider_http_client.close()
+    with _ollama_http_clients_lock:
+        clients = list(_ollama_http_clients.items())
+    for loop, client in clients:
+        # A closed loop has already torn down its connections
+        if client.is_closed or loop.is_closed() or loop.is_running():
+            continue
+        try:
+            loop.run_until_complete(client.aclose())
+        except Exception as e:
+            logger.debug(f"Could not close Ollama HTTP client cleanly: {e}")
+
+atexit.register(_close_http_clients)
+
 class OllamaAdapter(LLMProviderAdapter):
     """Adapter for Ollama models."""
     
     def __init__(self):
         self.client = None
+        # One client per model so switching models reuses its open connections
+        self._clients: Dict[str, ChatOllama] = {}
         if OLLAMA_AVAILABLE:
             try:
-                self.client = ChatOllama(
-                    model="qwen3:4b",
-                    base_url="http://localhost:11434",  # default Ollama port
-                    temperature=0.3
-                )
+                self.client = self._get_client("qwen3:4b")
                 logger.info("Ollama client initialized successfully with qwen3:4b")
             except Exception as e:
                 logger.warning(f"Ollama client initialization failed: {e}")
     
+    def _get_client(self, model_name: str) -> "ChatOllama":
+        """Get the cached ChatOllama client for a model, creating it on first use."""
+        client = self._clients.get(model_name)
+        if client is None:
+            client = self._clients[model_name] = ChatOllama(
+                model=model_name,
+                base_url=OLLAMA_BASE_URL,
+                temperature=OLLAMA_TEMPERATURE,
+                keep_alive=OLLAMA_KEEP_ALIVE
+            )
+        return client
+    
     def is_available(self) -> bool:
         return self.client is not None
     
-    def generate(self, prompt: str, model_config: ModelConfig, **kwargs) -> Dict[str, Any]:
+    def generate(self, prompt: str, model_config: ModelConfig, prefix: Optional[str] = None,
+                 **kwargs) -> Dict[str, Any]:
         if not self.is_available():
             raise RuntimeError("Ollama client not available")
         
         try:
-            # Update model if different from current
-            if self.client.model != model_config.name:
-                self.client = ChatOllama(
-                    model=model_config.name,
-                    base_url="http://localhost:11434",
-                    temperature=0.3
-                )
-            
-            # Use invoke method for ChatOllama
-            response = self.client.invoke(prompt)
+            # Use invoke method for ChatOllama (the shared prefix needs no flag: the
+            # server reuses its KV cache while the model is kept alive)
+            response = self._get_client(model_config.name).invoke(prompt)
             
             # Extract content from response
             if hasattr(response, 'content'):
@@ -415,77 +675,458 @@ class OllamaAdapter(LLMProviderAdapter):
             else:
                 content = str(response)
             
+            # Rough whitespace-token estimate, computed once per side
+            prompt_tokens = len(prompt.split())
+            completion_tokens = len(content.split())
+            
             return {
                 "content": content,
                 "model": model_config.name,
                 "provider": "ollama",
                 "usage": {
-                    "prompt_tokens": len(prompt.split()),  # Rough estimate
-                    "completion_tokens": len(content.split()),
-                    "total_tokens": len(prompt.split()) + len(content.split())
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
                 },
                 "cost": 0.0  # Local models have no cost
             }
         except Exception as e:
             logger.error(f"Ollama generation failed: {e}")
             raise
+    
+    async def agenerate(self, prompt: str, model_config: ModelConfig, prefix: Optional[str] = None,
+                        **kwargs) -> Dict[str, Any]:
+        """Generate response by posting directly to Ollama's /api/generate endpoint."""
+        if not HTTPX_AVAILABLE:
+            return await super().agenerate(prompt, model_config, prefix=prefix, **kwargs)
+        
+        payload = self._generate_payload(prompt, model_config, prefix, kwargs, stream=False)
+        
+        try:
+            response = await _get_ollama_http_client().post("/api/generate", json=payload)
+            response.raise_for_status()
+            data = response.json()
+            
+            content = data.get("response", "")
+            prompt_tokens = data.get("prompt_eval_count", len(prompt.split()))
+            completion_tokens = data.get("eval_count", len(content.split()))
+            
+            return {
+                "content": content,
+                "model": model_config.name,
+                "provider": "ollama",
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                },
+                "cost": 0.0  # Local models have no cost
+            }
+        except Exception as e:
+            logger.error(f"Ollama async generation failed: {e}")
+            raise
+    
+    async def astream(self, prompt: str, model_config: ModelConfig, prefix: Optional[str] = None,
+                      **kwargs) -> AsyncIterator[str]:
+        """Stream response text from Ollama's newline-delimited JSON /api/generate output."""
+        if not HTTPX_AVAILABLE:
+            async for chunk in super().astream(prompt, model_config, prefix=prefix, **kwargs):
+                yield chunk
+            return
+        
+        payload = self._generate_payload(prompt, model_config, prefix, kwargs, stream=True)
+        async with _get_ollama_http_client().stream("POST", "/api/generate", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if "error" in data:
+                    raise RuntimeError(f"Ollama streaming failed: {data['error']}")
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done"):
+                    break
+    
+    def _generate_payload(self, prompt: str, model_config: ModelConfig, prefix: Optional[str],
+                          kwargs: Dict[str, Any], stream: bool) -> Dict[str, Any]:
+        """Build the /api/generate request body with the same settings as the ChatOllama clients."""
+        return {
+            "model": model_config.name,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {"temperature": OLLAMA_TEMPERATURE, **kwargs.get("options", {})}
+        }
 
 # ===============================
 # CACHE MANAGEMENT
 # ===============================
 
+class LSHIndex:
+    """
+    Approximate cosine-similarity index using random-projection LSH.
+    
+    Each table hashes a vector to the sign pattern of its projections onto
+    `n_bits` random hyperplanes. A lookup scores only the keys sharing a
+    bucket with the query in at least one table, so cost tracks the number
+    of near neighbours rather than the size of the cache.
+    """
+    
+    def __init__(self, dim: int, n_hash_tables: int = 8, n_bits: int = 12, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.planes = [rng.standard_normal((dim, n_bits)).astype(np.float32) for _ in range(n_hash_tables)]
+        self._bit_weights = 1 << np.arange(n_bits)
+        self.tables: List[Dict[int, set]] = [defaultdict(set) for _ in range(n_hash_tables)]
+        self.vectors: Dict[str, np.ndarray] = {}
+    
+    def _hashes(self, vector: np.ndarray) -> List[int]:
+        """Bucket id of a vector in every table."""
+        return [int(((vector @ planes) > 0) @ self._bit_weights) for planes in self.planes]
+    
+    def add(self, key: str, vector: np.ndarray):
+        """Add a normalized vector under a cache key."""
+        vector = vector.astype(np.float32)
+        self.vectors[key] = vector
+        for table, bucket in zip(self.tables, self._hashes(vector)):
+            table[bucket].add(key)
+    
+    def add_many(self, keys: List[str], vectors: np.ndarray):
+        """Add a batch of normalized vectors, hashing them with one matrix product per table."""
+        vectors = vectors.astype(np.float32)
+        self.vectors.update(zip(keys, vectors))
+        for table, planes in zip(self.tables, self.planes):
+            buckets = ((vectors @ planes) > 0) @ self._bit_weights
+            for key, bucket in zip(keys, buckets.tolist()):
+                table[bucket].add(key)
+    
+    def remove(self, key: str):
+        """Remove a cache key from the index."""
+        vector = self.vectors.pop(key, None)
+        if vector is None:
+            return
+        for table, bucket in zip(self.tables, self._hashes(vector)):
+            table[bucket].discard(key)
+            if not table[bucket]:
+                del table[bucket]
+    
+    def search(self, vector: np.ndarray) -> Optional[Tuple[str, float]]:
+        """Return the closest candidate key and its exact cosine similarity."""
+        candidates = set()
+        for table, bucket in zip(self.tables, self._hashes(vector)):
+            candidates.update(table.get(bucket, ()))
+        if not candidates:
+            return None
+        
+        keys = list(candidates)
+        scores = np.stack([self.vectors[k] for k in keys]) @ vector
+        best = int(np.argmax(scores))
+        return keys[best], float(scores[best])
+
 class LLMCache:
-    """Cache for LLM responses to avoid repeat queries."""
+    """
+    Two-tier cache for LLM responses to avoid repeat queries.
+    
+    L1 is an exact match on (prompt, model, task). L2 finds a cached response
+    for a semantically similar prompt using sentence embeddings, searched
+    separately per (model, task) so responses never leak across tasks.
+    
+    Exact entries live in an in-process LRU and, when `persist_dir` is set,
+    in an LZ4-compressed disk cache that survives restarts.
+    """
+    
+    PARALLEL_HASH_BYTES = 1 << 20
     
-    def __init__(self, max_size: int = 1000, ttl_hours: int = 24):
-        self.cache = {}
+    def __init__(self, max_size: int = 1000, ttl_hours: int = 24,
+                 semantic_threshold: float = 0.92,
+                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 persist_dir: Optional[str] = None,
+                 disk_size_limit: int = 10 * 2**30):
+        self.cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.max_size = max_size
         self.ttl = timedelta(hours=ttl_hours)
+        self.semantic_threshold = semantic_threshold
+        self.embedding_model = embedding_model
+        self._encoder = None
+        self._semantic_indexes: Dict[Tuple[str, str], LSHIndex] = {}
+        self._semantic_scopes: Dict[str, Tuple[str, str]] = {}
+        self._embed = functools.lru_cache(maxsize=256)(self._encode)
+        
+        self.disk = None
+        if persist_dir:
+            if DISK_CACHE_AVAILABLE:
+                self.disk = diskcache.Cache(
+                    persist_dir,
+                    size_limit=disk_size_limit,
+                    eviction_policy="least-recently-used"
+                )
+            else:
+                logger.warning(f"Persistent LLM cache requested at {persist_dir} but dependencies are missing")
     
     def get(self, key: str) -> Optional[Dict[str, Any]]:
         """Get cached response if valid."""
         if key in self.cache:
             entry = self.cache[key]
             if datetime.now() - entry['timestamp'] < self.ttl:
+                self.cache.move_to_end(key)
                 return entry['response']
             else:
-                del self.cache[key]
+                self._evict(key)
+                return None
+        
+        if self.disk is not None:
+            payload, expire_time = self.disk.get(key, expire_time=True)
+            if payload is not None:
+                response = orjson.loads(lz4.frame.decompress(payload))
+                stored_at = datetime.fromtimestamp(expire_time) - self.ttl if expire_time else datetime.now()
+                self._set_memory(key, response, stored_at)
+                return response
         return None
     
     def set(self, key: str, response: Dict[str, Any]):
         """Cache a response."""
-        if len(self.cache) >= self.max_size:
-            # Remove oldest entry
-            oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k]['timestamp'])
-            del self.cache[oldest_key]
+        self._set_memory(key, response, datetime.now())
+        
+        if self.disk is not None:
+            try:
+                payload = lz4.frame.compress(orjson.dumps(response))
+                self.disk.set(key, payload, expire=self.ttl.total_seconds())
+            except Exception as e:
+                logger.warning(f"Failed to persist LLM cache entry: {e}")
+    
+    def _set_memory(self, key: str, response: Dict[str, Any], timestamp: datetime):
+        """Insert into the in-process LRU, evicting the least recently used entry."""
+        if key not in self.cache and len(self.cache) >= self.max_size:
+            oldest_key = next(iter(self.cache))
+            if self.disk is not None:
+                # Still reachable on disk, so keep its semantic entry
+                del self.cache[oldest_key]
+            else:
+                self._evict(oldest_key)
         
         self.cache[key] = {
             'response': response,
-            'timestamp': datetime.now()
+            'timestamp': timestamp
         }
+        self.cache.move_to_end(key)
+    
+    def _evict(self, key: str):
+        """Drop an entry from every cache tier."""
+        self.cache.pop(key, None)
+        if self.disk is not None:
+            self.disk.delete(key)
+        scope = self._semantic_scopes.pop(key, None)
+        if scope:
+            self._semantic_indexes[scope].remove(key)
+    
+    def _get_encoder(self) -> Optional["SentenceTransformer"]:
+        """Lazily load the sentence embedding model."""
+        if self._encoder is None and SENTENCE_TRANSFORMERS_AVAILABLE:
+            self._encoder = SentenceTransformer(self.embedding_model)
+        return self._encoder
+    
+    def _encode(self, prompt: str) -> Optional[np.ndarray]:
+        """Compute a normalized embedding for a prompt."""
+        encoder = self._get_encoder()
+        if encoder is None:
+            return None
+        return encoder.encode(prompt, convert_to_numpy=True, normalize_embeddings=True)
+    
+    def semantic_get(self, prompt: str, model: str, task_type: str) -> Optional[Dict[str, Any]]:
+        """Get a cached response for a semantically similar prompt, if any."""
+        index = self._semantic_indexes.get((model, task_type))
+        if index is None:
+            return None
+        
+        vector = self._embed(prompt)
+        if vector is None:
+            return None
+        
+        match = index.search(vector)
+        if match is None or match[1] < self.semantic_threshold:
+            return None
+        return self.get(match[0])
+    
+    def semantic_add(self, prompt: str, model: str, task_type: str, key: str):
+        """Register a cached entry for semantic lookup."""
+        vector = self._embed(prompt)
+        if vector is None or key in self._semantic_scopes:
+            return
+        
+        scope = (model, task_type)
+        self._get_semantic_index(scope, vector.shape[0]).add(key, vector)
+        self._semantic_scopes[key] = scope
+    
+    def _get_semantic_index(self, scope: Tuple[str, str], dim: int) -> LSHIndex:
+        """Get or create the semantic index for a (model, task) scope."""
+        index = self._semantic_indexes.get(scope)
+        if index is None:
+            index = self._semantic_indexes[scope] = LSHIndex(dim)
+        return index
+    
+    def warm(self, prompts: List[str], responses: List[Dict[str, Any]], model: str, task_type: str,
+             batch_size: int = 64) -> int:
+        """
+        Pre-populate both cache tiers with known prompt/response pairs.
+        
+        Prompts are embedded in batches rather than one call per prompt.
+        
+        Args:
+            prompts: Canonical prompts (e.g. FAQ or quiz questions)
+            responses: Response to cache for each prompt
+            model: Model name the responses belong to
+            task_type: Task type value the responses belong to
+            batch_size: Embedding batch size
+            
+        Returns:
+            Number of entries cached
+        """
+        keys = [self.generate_key(prompt, model, task_type) for prompt in prompts]
+        for key, response in zip(keys, responses):
+            self.set(key, response)
+        
+        encoder = self._get_encoder()
+        if encoder is None:
+            return len(keys)
+        
+        pending = [i for i, key in enumerate(keys) if key not in self._semantic_scopes]
+        if pending:
+            vectors = encoder.encode(
+                [prompts[i] for i in pending],
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            scope = (model, task_type)
+            new_keys = [keys[i] for i in pending]
+            self._get_semantic_index(scope, vectors.shape[1]).add_many(new_keys, vectors)
+            self._semantic_scopes.update((key, scope) for key in new_keys)
+        
+        return len(keys)
     
     def generate_key(self, prompt: str, model: str, task_type: str) -> str:
         """Generate cache key for a request."""
-        content = f"{prompt}:{model}:{task_type}"
-        return hashlib.md5(content.encode()).hexdigest()
+        content = f"{prompt}:{model}:{task_type}".encode()
+        if not BLAKE3_AVAILABLE:
+            return hashlib.blake2b(content, digest_size=16).hexdigest()
+        # Hash very long prompts on all cores
+        max_threads = blake3.AUTO if len(content) > self.PARALLEL_HASH_BYTES else 1
+        return blake3(content, max_threads=max_threads).hexdigest()
+
+# ===============================
+# REQUEST BATCHING
+# ===============================
+
+class _BatchQueue:
+    """
+    Coalesces concurrent requests for one (provider, model) into batched calls.
+    
+    The first request starts a drain task. A request with nothing else queued
+    is sent right away; otherwise the task waits up to `max_wait_ms` for more
+    requests (or until `max_batch_size` is reached). Each batch goes through
+    `provider.agenerate_batch` and every caller's future gets its own response
+    or exception.
+    """
+    
+    def __init__(self, provider: LLMProviderAdapter, model_config: ModelConfig,
+                 prefix: Optional[str] = None, max_batch_size: int = 32, max_wait_ms: int = 20):
+        self.provider = provider
+        self.model_config = model_config
+        self.prefix = prefix
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._drainer: Optional[asyncio.Task] = None
+    
+    async def submit(self, prompt: str) -> Dict[str, Any]:
+        """Queue a prompt and wait for its response."""
+        future = self.loop.create_future()
+        self.queue.put_nowait((prompt, future))
+        if self._drainer is None or self._drainer.done():
+            self._drainer = self.loop.create_task(self._drain())
+        return await future
+    
+    async def _drain(self):
+        """Send queued prompts in batches until the queue is empty."""
+        while not self.queue.empty():
+            batch = [self.queue.get_nowait()]
+            # Only wait for stragglers when requests are actually arriving concurrently
+            deadline = self.loop.time() + (self.max_wait if not self.queue.empty() else 0)
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self.loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            prompts = [prompt for prompt, _ in batch]
+            try:
+                responses = await self.provider.agenerate_batch(
+                    prompts, self.model_config, prefix=self.prefix, return_exceptions=True
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            # A failing prompt only fails its own caller
+            for (_, future), response in zip(batch, responses):
+                if future.done():
+                    continue
+                if isinstance(response, Exception):
+                    future.set_exception(response)
+                elif isinstance(response, BaseException):
+                    future.cancel()
+                else:
+                    future.set_result(response)
 
 # ===============================
 # MAIN LLM GATEWAY
 # ===============================
 
+# Zero-width split points after sentence punctuation; joining the parts restores the text
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])(?=\s)')
+
+TIMESTAMP_RESOLUTION = 0.01  # seconds between regenerating the cached ISO string
+_timestamp_cache = threading.local()
+
+def _iso_now() -> str:
+    """Current local time in ISO 8601, reformatted at most once per resolution window per thread."""
+    now = time.time()
+    if now - getattr(_timestamp_cache, 'epoch', 0.0) >= TIMESTAMP_RESOLUTION:
+        _timestamp_cache.epoch = now
+        _timestamp_cache.iso = datetime.fromtimestamp(now).isoformat()
+    return _timestamp_cache.iso
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+def _llm_cache_dir() -> Optional[str]:
+    """Disk cache directory when `llm.persist_cache` is enabled, resolved against the project root."""
+    if not config.get('llm.persist_cache', False):
+        return None
+    path = Path(config.get('paths.llm_cache', 'cache/llm'))
+    return str(path if path.is_absolute() else PROJECT_ROOT / path)
+
 class LLMGateway:
     """Main LLM Gateway - unified interface for all LLM operations."""
     
     def __init__(self):
         self.task_router = TaskRouter()
-        self.cache = LLMCache()
+        self.cache = LLMCache(persist_dir=_llm_cache_dir())
         
-        # Initialize provider adapters
-        self.providers = {
-            "openai": OpenAIAdapter(),
-            "anthropic": AnthropicAdapter(),
-            "ollama": OllamaAdapter()
+        # Provider adapters are created on first use
+        self._provider_factories = {
+            "openai": OpenAIAdapter,
+            "anthropic": AnthropicAdapter,
+            "ollama": OllamaAdapter
         }
+        self._providers: Dict[str, LLMProviderAdapter] = {}
+        self._providers_lock = threading.Lock()
+        self._batch_queues: Dict[Tuple[str, str, Optional[str]], _BatchQueue] = {}
     
     def generate(
         self,
@@ -493,78 +1134,350 @@ class LLMGateway:
         prompt: str,
         constraints: Dict[str, Any] = None,
         use_cache: bool = True,
+        prefix: Optional[str] = None,
+        use_semantic_cache: bool = False,
         **kwargs
     ) -> Dict[str, Any]:
-        """Generate response using appropriate LLM for the task."""
+        """
+        Generate response using appropriate LLM for the task.
         
-        # Check cache first
-        if use_cache:
-            model_config = self.task_router.select_model(task_type, constraints)
-            if model_config:
-                cache_key = self.cache.generate_key(prompt, model_config.name, task_type.value)
-                cached_response = self.cache.get(cache_key)
-                if cached_response:
-                    logger.info(f"Cache hit for task {task_type}")
-                    return cached_response
+        `prefix` marks the leading part of the prompt shared across requests so
+        providers can reuse it; by default the static head of the task's prompt
+        template is used when the prompt starts with it.
+        
+        `use_semantic_cache` also serves responses cached for similar (not
+        identical) prompts. It is off by default: prompts built from one long
+        template differ only in a short query, so unrelated questions can look
+        similar and would get each other's answers.
+        """
         
         # Select appropriate model
         model_config = self.task_router.select_model(task_type, constraints)
+        
+        # Check cache first
+        if use_cache and model_config:
+            cache_key = self.cache.generate_key(prompt, model_config.name, task_type.value)
+            cached_response = self._cached_response(cache_key, prompt, model_config, task_type, use_semantic_cache)
+            if cached_response:
+                return cached_response
+        
         if not model_config:
             raise RuntimeError(f"No suitable model found for task {task_type}")
         
         # Get provider adapter
-        provider = self.providers.get(model_config.provider)
-        if not provider or not provider.is_available():
-            # Try fallback model
-            if model_config.fallback_to:
-                fallback_config = self.task_router.model_registry.get_model(model_config.fallback_to)
-                if fallback_config:
-                    model_config = fallback_config
-                    provider = self.providers.get(model_config.provider)
-        
-        if not provider or not provider.is_available():
-            raise RuntimeError(f"No available provider for model {model_config.name}")
+        selected_config = model_config
+        model_config, provider = self._resolve_provider(model_config)
+        if prefix is None:
+            prefix = self._shared_prefix(task_type, prompt)
         
         # Generate response
         try:
-            response = provider.generate(prompt, model_config, **kwargs)
+            response = provider.generate(prompt, model_config, prefix=prefix, **kwargs)
+        except Exception as e:
+            logger.error(f"LLM generation failed: {e}")
+            self._record_provider_failure(provider, model_config, e)
             
-            # Add metadata
-            response.update({
-                "task_type": task_type.value,
-                "model_used": model_config.name,
-                "provider_used": model_config.provider,
-                "generated_at": datetime.now().isoformat(),
-                "constraints_applied": constraints or {}
-            })
+            # Try fallback if available
+            if model_config.fallback_to:
+                logger.info(f"Trying fallback model: {model_config.fallback_to}")
+                fallback_config = self.task_router.model_registry.get_model(model_config.fallback_to)
+                if fallback_config:
+                    fallback_provider = self._get_provider(fallback_config.provider)
+                    if fallback_provider and fallback_provider.check_available():
+                        return fallback_provider.generate(prompt, fallback_config, prefix=prefix, **kwargs)
             
-            # Cache response
-            if use_cache:
+            raise
+        
+        self._add_response_metadata(response, task_type, model_config, constraints)
+        
+        # Cache response, reusing the lookup key unless a fallback model answered
+        if use_cache:
+            if model_config is not selected_config:
                 cache_key = self.cache.generate_key(prompt, model_config.name, task_type.value)
-                self.cache.set(cache_key, response)
-            
-            return response
-            
+            self._cache_response(cache_key, prompt, model_config, task_type, response, use_semantic_cache)
+        
+        return response
+    
+    async def agenerate(
+        self,
+        task_type: TaskType,
+        prompt: str,
+        constraints: Dict[str, Any] = None,
+        use_cache: bool = True,
+        prefix: Optional[str] = None,
+        use_semantic_cache: bool = False,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Async variant of `generate`.
+        
+        Concurrent calls routed to the same model are coalesced into batched
+        provider calls. Calls with extra provider kwargs bypass batching.
+        """
+        model_config = self.task_router.select_model(task_type, constraints)
+        if not model_config:
+            raise RuntimeError(f"No suitable model found for task {task_type}")
+        
+        # Check cache first
+        if use_cache:
+            cache_key = self.cache.generate_key(prompt, model_config.name, task_type.value)
+            cached_response = self._cached_response(cache_key, prompt, model_config, task_type, use_semantic_cache)
+            if cached_response:
+                return cached_response
+        
+        selected_config = model_config
+        model_config, provider = self._resolve_provider(model_config)
+        if prefix is None:
+            prefix = self._shared_prefix(task_type, prompt)
+        
+        try:
+            if kwargs:
+                response = await provider.agenerate(prompt, model_config, prefix=prefix, **kwargs)
+            else:
+                response = await self._get_batch_queue(model_config, provider, prefix).submit(prompt)
         except Exception as e:
             logger.error(f"LLM generation failed: {e}")
+            self._record_provider_failure(provider, model_config, e)
             
             # Try fallback if available
             if model_config.fallback_to:
                 logger.info(f"Trying fallback model: {model_config.fallback_to}")
                 fallback_config = self.task_router.model_registry.get_model(model_config.fallback_to)
                 if fallback_config:
-                    fallback_provider = self.providers.get(fallback_config.provider)
-                    if fallback_provider and fallback_provider.is_available():
-                        return fallback_provider.generate(prompt, fallback_config, **kwargs)
+                    fallback_provider = self._get_provider(fallback_config.provider)
+                    if fallback_provider and fallback_provider.check_available():
+                        return await fallback_provider.agenerate(prompt, fallback_config, prefix=prefix, **kwargs)
             
             raise
+        
+        self._add_response_metadata(response, task_type, model_config, constraints)
+        
+        if use_cache:
+            if model_config is not selected_config:
+                cache_key = self.cache.generate_key(prompt, model_config.name, task_type.value)
+            self._cache_response(cache_key, prompt, model_config, task_type, response, use_semantic_cache)
+        
+        return response
+    
+    async def stream(
+        self,
+        task_type: TaskType,
+        prompt: str,
+        constraints: Dict[str, Any] = None,
+        use_cache: bool = True,
+        prefix: Optional[str] = None,
+        use_semantic_cache: bool = False,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream the response text for a task as it is generated.
+        
+        Cache hits are replayed sentence by sentence. On a miss, chunks are
+        yielded as they arrive and the full response is cached only once the
+        stream completes; failed or abandoned streams are never cached.
+        """
+        model_config = self.task_router.select_model(task_type, constraints)
+        if not model_config:
+            raise RuntimeError(f"No suitable model found for task {task_type}")
+        
+        # Check cache first
+        if use_cache:
+            cache_key = self.cache.generate_key(prompt, model_config.name, task_type.value)
+            cached_response = self._cached_response(cache_key, prompt, model_config, task_type, use_semantic_cache)
+            if cached_response:
+                for sentence in _SENTENCE_BOUNDARY.split(cached_response["content"]):
+                    yield sentence
+                return
+        
+        selected_config = model_config
+        model_config, provider = self._resolve_provider(model_config)
+        if prefix is None:
+            prefix = self._shared_prefix(task_type, prompt)
+        
+        chunks: List[str] = []
+        try:
+            async for chunk in provider.astream(prompt, model_config, prefix=prefix, **kwargs):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"LLM streaming failed: {e}")
+            self._record_provider_failure(provider, model_config, e)
+            raise
+        
+        if use_cache:
+            content = "".join(chunks)
+            completion_tokens = len(content.split())
+            prompt_tokens = len(prompt.split())
+            response = {
+                "content": content,
+                "model": model_config.name,
+                "provider": model_config.provider,
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                },
+                # Estimated from the word counts: streamed output carries no usage data
+                "cost": (prompt_tokens + completion_tokens) / 1000 * model_config.cost_per_1k_tokens
+            }
+            self._add_response_metadata(response, task_type, model_config, constraints)
+            if model_config is not selected_config:
+                cache_key = self.cache.generate_key(prompt, model_config.name, task_type.value)
+            self._cache_response(cache_key, prompt, model_config, task_type, response, use_semantic_cache)
+    
+    def _resolve_provider(self, model_config: ModelConfig) -> Tuple[ModelConfig, LLMProviderAdapter]:
+        """Get an available provider for a model, switching to its fallback model if needed."""
+        provider = self._get_provider(model_config.provider)
+        if not provider or not provider.check_available():
+            # Try fallback model
+            if model_config.fallback_to:
+                fallback_config = self.task_router.model_registry.get_model(model_config.fallback_to)
+                if fallback_config:
+                    model_config = fallback_config
+                    provider = self._get_provider(model_config.provider)
+        
+        if not provider or not provider.check_available():
+            raise RuntimeError(f"No available provider for model {model_config.name}")
+        
+        return model_config, provider
+    
+    def _record_provider_failure(self, provider: LLMProviderAdapter, model_config: ModelConfig,
+                                 error: BaseException):
+        """
+        Open a provider's circuit after a failed call, when that is useful.
+        
+        Only connection failures count, and only when the model has a fallback
+        to route to: opening the circuit on the last provider would just turn
+        every later request into "No available provider".
+        """
+        if model_config.fallback_to and _is_connection_error(error):
+            provider.mark_unavailable()
+    
+    def _shared_prefix(self, task_type: TaskType, prompt: str) -> Optional[str]:
+        """Static head of the task's prompt template, if the prompt starts with it."""
+        task_config = self.task_router.task_configs.get(task_type)
+        if task_config:
+            template_head = task_config.prompt_template.split("{", 1)[0]
+            if template_head and prompt.startswith(template_head):
+                return template_head
+        return None
+    
+    def _get_batch_queue(self, model_config: ModelConfig, provider: LLMProviderAdapter,
+                         prefix: Optional[str] = None) -> _BatchQueue:
+        """Get the request batcher for a (provider, model, prefix) on the running event loop."""
+        queue_key = (model_config.provider, model_config.name, prefix)
+        batch_queue = self._batch_queues.get(queue_key)
+        if batch_queue is None or batch_queue.loop is not asyncio.get_running_loop():
+            batch_queue = self._batch_queues[queue_key] = _BatchQueue(provider, model_config, prefix)
+        return batch_queue
+    
+    def _cached_response(self, cache_key: str, prompt: str, model_config: ModelConfig,
+                         task_type: TaskType, use_semantic_cache: bool) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response: exact match first, then (if enabled) a similar prompt.
+        
+        A failing cache is treated as a miss so it never blocks generation.
+        """
+        try:
+            cached_response = self.cache.get(cache_key)
+            if cached_response:
+                logger.info(f"Cache hit for task {task_type}")
+                return {**cached_response, "cache_status": "HIT-L1"}
+            
+            if use_semantic_cache:
+                cached_response = self.cache.semantic_get(prompt, model_config.name, task_type.value)
+                if cached_response:
+                    logger.info(f"Semantic cache hit for task {task_type}")
+                    # Warm L1 so an identical prompt hits exactly next time
+                    self.cache.set(cache_key, cached_response)
+                    return {**cached_response, "cache_status": "HIT-L2"}
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed, generating instead: {e}")
+        return None
+    
+    def _cache_response(self, cache_key: str, prompt: str, model_config: ModelConfig,
+                        task_type: TaskType, response: Dict[str, Any], use_semantic_cache: bool):
+        """Store a generated response; cache failures are logged, never raised to the caller."""
+        try:
+            self.cache.set(cache_key, response)
+            if use_semantic_cache:
+                self.cache.semantic_add(prompt, model_config.name, task_type.value, cache_key)
+        except Exception as e:
+            logger.warning(f"Failed to cache LLM response for task {task_type}: {e}")
+    
+    def _add_response_metadata(self, response: Dict[str, Any], task_type: TaskType,
+                               model_config: ModelConfig, constraints: Optional[Dict[str, Any]]):
+        """Attach routing metadata to a freshly generated response."""
+        response.update({
+            "task_type": task_type.value,
+            "model_used": model_config.name,
+            "provider_used": model_config.provider,
+            "generated_at": _iso_now(),
+            "constraints_applied": constraints or {},
+            "cache_status": "MISS"
+        })
+    
+    def _get_provider(self, name: str) -> Optional[LLMProviderAdapter]:
+        """Get a provider adapter, instantiating it on first access."""
+        provider = self._providers.get(name)
+        if provider is None and name in self._provider_factories:
+            with self._providers_lock:
+                provider = self._providers.get(name)
+                if provider is None:
+                    provider = self._providers[name] = self._provider_factories[name]()
+        return provider
+    
+    def warm_cache(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Warm the response cache from prompt/response records.
+        
+        Args:
+            records: Dicts with "task_type", "prompt" and "response"
+                (a string or a response dict with "content")
+            
+        Returns:
+            Number of entries cached
+        """
+        grouped: Dict[TaskType, List[Dict[str, Any]]] = defaultdict(list)
+        for record in records:
+            grouped[TaskType(record["task_type"])].append(record)
+        
+        warmed = 0
+        for task_type, task_records in grouped.items():
+            model_config = self.task_router.select_model(task_type)
+            if not model_config:
+                logger.warning(f"Skipping cache warm-up for {task_type}: no model available")
+                continue
+            
+            responses = []
+            for record in task_records:
+                response = record["response"]
+                if isinstance(response, str):
+                    response = {"content": response}
+                # Same shape as a generated response, so cache hits carry cost/model_used
+                response = {
+                    "model": model_config.name,
+                    "provider": model_config.provider,
+                    "cost": 0.0,  # nothing was spent producing a warmed entry
+                    **response
+                }
+                self._add_response_metadata(response, task_type, model_config, None)
+                responses.append(response)
+            
+            warmed += self.cache.warm(
+                [record["prompt"] for record in task_records],
+                responses,
+                model_config.name,
+                task_type.value
+            )
+        return warmed
     
     def get_available_models(self) -> List[ModelConfig]:
         """Get list of available models."""
         available = []
         for model in self.task_router.model_registry.models.values():
-            provider = self.providers.get(model.provider)
-            if provider and provider.is_available():
+            provider = self._get_provider(model.provider)
+            if provider and provider.check_available():
                 available.append(model)
         return available
     
@@ -572,11 +1485,11 @@ class LLMGateway:
         """Get configuration for a specific task type."""
         return self.task_router.task_configs.get(task_type)
     
-    def health_check(self) -> Dict[str, bool]:
-        """Check health of all providers."""
+    def health_check(self, force: bool = False) -> Dict[str, bool]:
+        """Check health of all providers; `force=True` re-probes instead of using cached results."""
         health = {}
-        for provider_name, provider in self.providers.items():
-            health[provider_name] = provider.is_available()
+        for provider_name in self._provider_factories:
+            health[provider_name] = self._get_provider(provider_name).check_available(force=force)
         return health
 
 # ===============================
@@ -584,12 +1497,15 @@ class LLMGateway:
 # ===============================
 
 _llm_gateway = None
+_llm_gateway_lock = threading.Lock()
 
 def get_llm_gateway() -> LLMGateway:
     """Get the global LLM Gateway instance."""
     global _llm_gateway
     if _llm_gateway is None:
-        _llm_gateway = LLMGateway()
+        with _llm_gateway_lock:
+            if _llm_gateway is None:
+                _llm_gateway = LLMGateway()
     return _llm_gateway
 
 # ===============================
@@ -645,6 +1561,26 @@ def example_usage():
     health = gateway.health_check()
     print(f"Provider health: {health}")
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="LLM Gateway utilities")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    warm_parser = subparsers.add_parser("warm-cache", help="Pre-populate the response cache")
+    warm_parser.add_argument("--file", required=True,
+                             help="JSONL file of {task_type, prompt, response} records")
+    
+    args = parser.parse_args()
+    
+    if args.command == "warm-cache":
+        with open(args.file, "r") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        warmed = get_llm_gateway().warm_cache(records)
+        print(f"✅ Warmed LLM cache with {warmed} entries from {args.file}")
+        return 0
+    
     test_ollama_connection()
-    example_usage() 
\ No newline at end of file
+    example_usage()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main()) 
\ No newline at end of file
@@ -9,6 +9,11 @@ import logging
 import time
 import json
 import functools
+import heapq
+import itertools
+import math
+from collections import deque
+from dataclasses import dataclass
 from typing import Dict, Any, Optional, Callable
 from datetime import datetime
 from pathlib import Path
@@ -19,6 +24,55 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from config.loader import config
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.warning("orjson not available, log context uses json. Install with: pip install orjson")
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logging.warning("numpy not available, metric percentiles computed in Python. Install with: pip install numpy")
+
+def _dumps_context(context: Dict[str, Any]) -> str:
+    """Serialize log context to JSON; never raises for unusual keys or values."""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(context, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            # orjson rejects e.g. integers wider than 64 bits
+            pass
+    return json.dumps(context, default=str)
+
+def _percentiles(samples, percents) -> list:
+    """Linearly interpolated percentiles, matching numpy's default method."""
+    if NUMPY_AVAILABLE:
+        return [float(p) for p in np.percentile(np.fromiter(samples, dtype=float), percents)]
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    results = []
+    for percent in percents:
+        position = last * percent / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, last)
+        results.append(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower))
+    return results
+
+# Process-wide operation sequence; next() on itertools.count is atomic under the GIL
+_operation_ids = itertools.count(1)
+
+@dataclass(slots=True)
+class OpRecord:
+    """In-flight operation tracked between start_operation and end_operation."""
+    operation: str
+    start_ns: int
+    service: str
+    subsystem: Optional[str]
+
 class ServiceLogger:
     """Enhanced logger with service context and performance tracking."""
     
@@ -68,66 +122,63 @@ class ServiceLogger:
     
     def info(self, message: str, **kwargs):
         """Log info message with optional structured data."""
-        self._log_with_context(logging.INFO, message, **kwargs)
+        if self.logger.isEnabledFor(logging.INFO):
+            self._log_with_context(logging.INFO, message, **kwargs)
     
     def error(self, message: str, **kwargs):
         """Log error message with optional structured data."""
-        self._log_with_context(logging.ERROR, message, **kwargs)
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._log_with_context(logging.ERROR, message, **kwargs)
     
     def warning(self, message: str, **kwargs):
         """Log warning message with optional structured data."""
-        self._log_with_context(logging.WARNING, message, **kwargs)
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._log_with_context(logging.WARNING, message, **kwargs)
     
     def debug(self, message: str, **kwargs):
         """Log debug message with optional structured data."""
-        self._log_with_context(logging.DEBUG, message, **kwargs)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._log_with_context(logging.DEBUG, message, **kwargs)
     
     def _log_with_context(self, level: int, message: str, **kwargs):
-        """Log message with service context and optional structured data."""
-        if kwargs:
-            context_str = " | " + " | ".join([f"{k}={v}" for k, v in kwargs.items()])
-            message = message + context_str
+        """Log message with service context and optional structured data.
         
+        Keyword arguments are serialized once as a JSON object and appended to the
+        message, so every handler (including ones on ancestor loggers) sees them.
+        """
+        if kwargs:
+            message = message + " | " + _dumps_context(kwargs)
         self.logger.log(level, message)
     
     def start_operation(self, operation_name: str) -> str:
         """Start timing an operation. Returns operation ID."""
-        operation_id = f"{operation_name}_{int(time.time() * 1000)}"
-        self.performance_data[operation_id] = {
-            'operation': operation_name,
-            'start_time': time.time(),
-            'service': self.service_name,
-            'subsystem': self.subsystem
-        }
+        operation_id = f"{operation_name}_{next(_operation_ids)}"
+        self.performance_data[operation_id] = OpRecord(
+            operation=operation_name,
+            start_ns=time.perf_counter_ns(),
+            service=self.service_name,
+            subsystem=self.subsystem
+        )
         self.info(f"Started {operation_name}", operation_id=operation_id)
         return operation_id
     
     def end_operation(self, operation_id: str, success: bool = True, **metrics):
         """End timing an operation and log performance metrics."""
-        if operation_id not in self.performance_data:
+        # Pop up front so completed operations are always cleaned up
+        record = self.performance_data.pop(operation_id, None)
+        if record is None:
             self.warning(f"Operation ID {operation_id} not found in performance data")
             return
         
-        operation_data = self.performance_data[operation_id]
-        duration = time.time() - operation_data['start_time']
-        
-        operation_data.update({
-            'end_time': time.time(),
-            'duration_seconds': duration,
-            'success': success,
-            **metrics
-        })
+        duration = (time.perf_counter_ns() - record.start_ns) / 1e9
         
         status = "✅ Completed" if success else "❌ Failed"
         self.info(
-            f"{status} {operation_data['operation']} in {duration:.2f}s",
+            f"{status} {record.operation} in {duration:.2f}s",
             operation_id=operation_id,
             duration=f"{duration:.2f}s",
             **metrics
         )
-        
-        # Clean up completed operations
-        del self.performance_data[operation_id]
     
     def log_state_transition(self, from_state: str, to_state: str, **context):
         """Log state transitions for debugging workflows."""
@@ -147,17 +198,29 @@ class ServiceLogger:
 def timed_operation(operation_name: str = None):
     """Decorator to automatically time and log function execution."""
     def decorator(func: Callable) -> Callable:
+        op_name = operation_name or func.__name__
+        fallback_logger = None
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            nonlocal fallback_logger
             # Try to get logger from self if it's a method
-            logger = None
-            if args and hasattr(args[0], 'logger') and isinstance(args[0].logger, ServiceLogger):
+            if args and isinstance(getattr(args[0], 'logger', None), ServiceLogger):
                 logger = args[0].logger
             else:
-                # Create a generic logger
-                logger = ServiceLogger(func.__name__)
+                # Create the generic logger once per decorated function
+                if fallback_logger is None:
+                    fallback_logger = ServiceLogger(func.__name__)
+                logger = fallback_logger
+            
+            # Fast path: timing is only reported at INFO, so skip it entirely
+            if not logger.logger.isEnabledFor(logging.INFO):
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    logger.log_error_with_context(e, operation=op_name)
+                    raise
             
-            op_name = operation_name or func.__name__
             operation_id = logger.start_operation(op_name)
             
             try:
@@ -190,32 +253,90 @@ def get_orchestrator_logger(service_name: str = "orchestrator") -> ServiceLogger
     return ServiceLogger(service_name, "orchestrator")
 
 # Global performance tracking
+METRIC_WINDOW_SIZE = 10000
+
+class MetricBuffer:
+    """Bounded window of recent samples for one metric plus lifetime aggregates."""
+    
+    __slots__ = ('unit', 'samples', 'count', 'total', 'min', 'max')
+    
+    def __init__(self, unit: str = "", maxlen: int = METRIC_WINDOW_SIZE):
+        self.unit = unit
+        self.samples = deque(maxlen=maxlen)  # (value, epoch seconds, tags, sequence)
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+    
+    def add(self, value: float, timestamp: float, tags: Dict[str, Any], sequence: int):
+        """Append a sample and update the running aggregates in O(1)."""
+        self.samples.append((value, timestamp, tags, sequence))
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    def summary(self) -> Dict[str, Any]:
+        """Aggregates over all samples; percentiles over the retained window."""
+        p50, p95, p99 = _percentiles([sample[0] for sample in self.samples], [50, 95, 99])
+        return {
+            'unit': self.unit,
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count,
+            'min': self.min,
+            'max': self.max,
+            'p50': p50,
+            'p95': p95,
+            'p99': p99,
+            'last_recorded': datetime.fromtimestamp(self.samples[-1][1]).isoformat()
+        }
+
 class PerformanceTracker:
     """Global performance tracking for the entire system."""
     
-    def __init__(self):
-        self.metrics = {}
+    def __init__(self, window_size: int = METRIC_WINDOW_SIZE):
+        self.window_size = window_size
+        self.metrics: Dict[str, MetricBuffer] = {}
+        self._sequence = itertools.count()
         self.logger = get_service_logger("performance_tracker", "system")
     
     def record_metric(self, metric_name: str, value: float, unit: str = "", **tags):
         """Record a performance metric."""
-        timestamp = datetime.now().isoformat()
-        self.metrics[f"{metric_name}_{timestamp}"] = {
-            'metric': metric_name,
-            'value': value,
-            'unit': unit,
-            'timestamp': timestamp,
-            'tags': tags
-        }
+        buffer = self.metrics.get(metric_name)
+        if buffer is None:
+            buffer = self.metrics[metric_name] = MetricBuffer(unit, self.window_size)
+        buffer.add(value, time.time(), tags, next(self._sequence))
         
         self.logger.info(f"Metric recorded: {metric_name} = {value} {unit}", **tags)
     
     def get_performance_summary(self) -> Dict[str, Any]:
-        """Get summary of all recorded metrics."""
+        """Get summary of all recorded metrics (the retained window of each, oldest first)."""
+        # Each buffer is already in recording order, so a k-way merge restores the global order
+        samples = heapq.merge(
+            *(zip(itertools.repeat(name), buffer.samples) for name, buffer in self.metrics.items()),
+            key=lambda sample: sample[1][3]
+        )
+        metrics = [
+            {
+                'metric': name,
+                'value': value,
+                'unit': self.metrics[name].unit,
+                'timestamp': datetime.fromtimestamp(timestamp).isoformat(),
+                'tags': tags
+            }
+            for name, (value, timestamp, tags, _) in samples
+        ]
         return {
-            'total_metrics': len(self.metrics),
-            'metrics': list(self.metrics.values())
+            'total_metrics': len(metrics),
+            'metrics': metrics
         }
+    
+    def get_metric_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get aggregate statistics (count, sum, min/max, p50/p95/p99) per metric."""
+        return {name: buffer.summary() for name, buffer in self.metrics.items()}
 
 # Global performance tracker instance
 performance_tracker = PerformanceTracker() 
\ No newline at end of file
@@ -10,10 +10,17 @@ Consolidates all state management operations across the system:
 
 from typing import Dict, List, Optional, Any, Literal, Union
 from typing_extensions import TypedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field as dataclass_field, fields as dataclass_fields, is_dataclass, make_dataclass
 from langchain_core.messages import BaseMessage
 from pydantic import BaseModel
 from enum import Enum
+import itertools
 import logging
+import threading
+import time
+import weakref
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +28,10 @@ logger = logging.getLogger(__name__)
 # ENUMERATIONS
 # ===============================
 
+# These stay str-valued: callers compare statuses with plain strings ("completed")
+# and serialize them as JSON. str-mixin members already hash with str.__hash__,
+# so dict keys and comparisons cost the same as interned strings.
+
 class SubsystemType(str, Enum):
     CONTENT = "content"
     LEARNER = "learner" 
@@ -35,6 +46,17 @@ class ServiceStatus(str, Enum):
     ERROR = "error"
     SKIPPED = "skipped"
 
+# ===============================
+# SERVICE EXECUTION RECORDS
+# ===============================
+
+@dataclass(slots=True)
+class ServiceRecord:
+    """Status, result and error of one service, gathered from the state's service dicts."""
+    status: Optional[ServiceStatus] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
 # ===============================
 # UNIFIED STATE SCHEMA
 # ===============================
@@ -71,8 +93,8 @@ class UnifiedState(TypedDict, total=False):
     # ===== SERVICE EXECUTION TRACKING =====
     service_statuses: Dict[str, ServiceStatus]  # service_id -> status
     service_results: Dict[str, Dict[str, Any]]  # service_id -> result
-    service_errors: Dict[str, str]  # service_id -> error_message
-    execution_history: List[Dict[str, Any]]  # chronological execution log
+    service_errors: Dict[str, str]  # service_id -> error
+    execution_history: List[Dict[str, Any]]  # chronological execution log (bounded)
     
     # ===== INPUT PROCESSING =====
     upload_type: Optional[Literal["pdf", "elasticsearch", "llm_generated"]]
@@ -216,6 +238,166 @@ class AnalyticsSubsystemState(TypedDict, total=False):
     engagement_data: List[Dict[str, Any]]
     performance_indicators: Dict[str, Any]
 
+# ===============================
+# SLOTTED SUBSYSTEM STATE VIEWS
+# ===============================
+
+def _view_to_dict(self) -> Dict[str, Any]:
+    """Shallow dict of a state view, suitable for merge_subsystem_state."""
+    return {f.name: getattr(self, f.name) for f in dataclass_fields(self)}
+
+def _make_state_view(name: str, schema: type) -> type:
+    """
+    Generate a slotted dataclass mirroring a subsystem TypedDict schema.
+    
+    Args:
+        name: Class name of the generated view
+        schema: Subsystem TypedDict whose annotations define the fields
+        
+    Returns:
+        Dataclass with one optional field (default None) per schema key
+    """
+    view_fields = [
+        (key, Optional[annotation], dataclass_field(default=None))
+        for key, annotation in schema.__annotations__.items()
+    ]
+    view = make_dataclass(
+        name,
+        view_fields,
+        slots=True,
+        namespace={'__doc__': schema.__doc__, 'to_dict': _view_to_dict}
+    )
+    # Register under this module so instances pickle by reference
+    view.__module__ = __name__
+    return view
+
+ContentState = _make_state_view("ContentState", ContentSubsystemState)
+LearnerState = _make_state_view("LearnerState", LearnerSubsystemState)
+SMEState = _make_state_view("SMEState", SMESubsystemState)
+AnalyticsState = _make_state_view("AnalyticsState", AnalyticsSubsystemState)
+
+SUBSYSTEM_STATE_VIEWS: Dict[SubsystemType, type] = {
+    SubsystemType.CONTENT: ContentState,
+    SubsystemType.LEARNER: LearnerState,
+    SubsystemType.SME: SMEState,
+    SubsystemType.ANALYTICS: AnalyticsState,
+}
+
+# ===============================
+# SUBSYSTEM EXTRACTORS
+# ===============================
+
+def _extract_content(state: UnifiedState) -> Dict[str, Any]:
+    g = state.get
+    return {
+        "course_id": g("course_id"),
+        "faculty_id": g("faculty_id"),
+        "upload_type": g("upload_type"),
+        "file_path": g("file_path"),
+        "es_index": g("es_index"),
+        "chunks": g("chunks", []),
+        "content_metadata": g("content_metadata", {}),
+        "knowledge_graph": g("knowledge_graph"),
+        "facd": g("facd"),
+        "fccs": g("fccs"),
+        "ffcs": g("ffcs")
+    }
+
+def _extract_learner(state: UnifiedState) -> Dict[str, Any]:
+    g = state.get
+    return {
+        "learner_id": g("learner_id"),
+        "course_id": g("course_id"),
+        "learner_context": g("learner_context"),
+        "learning_preferences": g("learning_preferences"),
+        "personalized_learning_tree": g("personalized_learning_tree"),
+        "query_strategy": g("query_strategy"),
+        "query_results": g("query_results")
+    }
+
+def _extract_sme(state: UnifiedState) -> Dict[str, Any]:
+    g = state.get
+    return {
+        "sme_id": g("sme_id"),
+        "course_id": g("course_id"),
+        "review_assignments": g("sme_assignments", []),
+        "review_status": g("review_status"),
+        "expert_feedback": g("expert_feedback", [])
+    }
+
+def _extract_analytics(state: UnifiedState) -> Dict[str, Any]:
+    g = state.get
+    return {
+        "course_id": g("course_id"),
+        "learner_id": g("learner_id"),
+        "learning_metrics": g("learning_metrics", {}),
+        "engagement_data": g("engagement_data", []),
+        "performance_indicators": g("performance_indicators", {})
+    }
+
+def _extract_nothing(state: UnifiedState) -> Dict[str, Any]:
+    return {}
+
+_SUBSYSTEM_EXTRACTORS = {
+    SubsystemType.CONTENT: _extract_content,
+    SubsystemType.LEARNER: _extract_learner,
+    SubsystemType.SME: _extract_sme,
+    SubsystemType.ANALYTICS: _extract_analytics,
+}
+
+# Fields validate_state requires, and the identifier each subsystem should carry
+_REQUIRED_FIELDS = ("session_id",)
+_SUBSYSTEM_ID_FIELDS = {
+    SubsystemType.CONTENT: ("course_id", "Content subsystem should have course_id"),
+    SubsystemType.LEARNER: ("learner_id", "Learner subsystem should have learner_id"),
+}
+
+# ===============================
+# AGENT STATE VIEWS
+# ===============================
+
+# Agent-visible fields mapped to a factory for the value used when a field is absent
+_AGENT_BASE_FIELDS = {"messages": list, "session_id": None, "course_id": None}
+_AGENT_SCHEMAS = {
+    "stage1": {**_AGENT_BASE_FIELDS, "chunks": list, "content_metadata": dict, "facd": None},
+    "stage2": {**_AGENT_BASE_FIELDS, "facd": None, "fccs": None},
+}
+
+class _AgentView(Mapping):
+    """Read-only mapping exposing an agent's whitelisted fields of a unified state without copying."""
+    
+    __slots__ = ('_state', '_schema')
+    
+    def __init__(self, state: UnifiedState, schema: Dict[str, Any]):
+        self._state = state
+        self._schema = schema
+    
+    def __getitem__(self, key: str) -> Any:
+        default_factory = self._schema[key]
+        if key in self._state:
+            return self._state[key]
+        return default_factory() if default_factory else None
+    
+    def __iter__(self):
+        return iter(self._schema)
+    
+    def __len__(self) -> int:
+        return len(self._schema)
+    
+    def __repr__(self) -> str:
+        return f"_AgentView({dict(self)!r})"
+
+# ===============================
+# FACULTY APPROVAL CONSISTENCY
+# ===============================
+
+# (approval flag, data field, message when approved without data) per faculty stage
+_APPROVAL_STAGES = (
+    ("facd_approved", "facd", "facd_approved=True but no facd data"),
+    ("fccs_approved", "fccs", "fccs_approved=True but no fccs data"),
+    ("ffcs_approved", "ffcs", "ffcs_approved=True but no ffcs data"),
+)
+
 # ===============================
 # FACULTY APPROVAL SCHEMAS
 # ===============================
@@ -248,6 +430,183 @@ class FFCSSchema(BaseModel):
     faculty_final_approval: bool
     approval_timestamp: Optional[str]
 
+# ===============================
+# VALIDATION RESULT
+# ===============================
+
+_VALIDATION_KEYS = ("valid", "errors", "warnings", "missing_fields", "inconsistent_fields")
+
+@dataclass(slots=True)
+class ValidationResult(Mapping):
+    """Outcome of `validate_state`; a read-only mapping like the old result dict."""
+    valid: bool = True
+    errors: List[str] = dataclass_field(default_factory=list)
+    warnings: List[str] = dataclass_field(default_factory=list)
+    missing_fields: List[str] = dataclass_field(default_factory=list)
+    inconsistent_fields: List[str] = dataclass_field(default_factory=list)
+    
+    def __getitem__(self, key: str) -> Any:
+        """Dict-style access for callers written against the old result dict."""
+        if key not in _VALIDATION_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self):
+        return iter(_VALIDATION_KEYS)
+    
+    def __len__(self) -> int:
+        return len(_VALIDATION_KEYS)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Independent dict copy of the result (JSON-serializable)."""
+        return {
+            "valid": self.valid,
+            "errors": list(self.errors),
+            "warnings": list(self.warnings),
+            "missing_fields": list(self.missing_fields),
+            "inconsistent_fields": list(self.inconsistent_fields)
+        }
+
+# ===============================
+# EXECUTION HISTORY
+# ===============================
+
+# Entries kept per state; update_service_status drops the oldest beyond this
+EXECUTION_HISTORY_SIZE = 10_000
+
+# ===============================
+# STATE LOCKS
+# ===============================
+
+# One lock per state, looked up by identity and kept only while some thread holds
+# or waits on it. Nothing is stored in the state, so it stays a plain serializable
+# dict; an id can only be reused once its state is gone, and by then no caller
+# references the old lock.
+_state_locks: "weakref.WeakValueDictionary[int, threading.RLock]" = weakref.WeakValueDictionary()
+_state_locks_guard = threading.Lock()
+
+def _state_lock(state: Any) -> threading.RLock:
+    """Lock guarding read-modify-write access to one state."""
+    key = id(state)
+    with _state_locks_guard:
+        lock = _state_locks.get(key)
+        if lock is None:
+            lock = _state_locks[key] = threading.RLock()
+    return lock
+
+# ===============================
+# STATE DEFAULTS
+# ===============================
+
+# Flag defaults of a new state; containers are created per state in _new_state
+_STATE_TEMPLATE: Dict[str, Any] = {
+    "state_validated": False,
+    "cross_system_compatibility": False,
+    "required_fields_present": False,
+    "service_compatibility_checked": False,
+    "facd_approved": False,
+    "fccs_approved": False,
+    "ffcs_approved": False,
+}
+
+def _new_state() -> UnifiedState:
+    """Fresh state dict holding the default flags and empty containers."""
+    state = _STATE_TEMPLATE.copy()
+    state.update(
+        messages=[],
+        service_statuses={},
+        service_results={},
+        service_errors={},
+        execution_history=[],
+        chunks=[],
+        cypher_queries=[],
+        validation_errors=[],
+        errors=[]
+    )
+    return state
+
+# ===============================
+# SLOTTED UNIFIED STATE
+# ===============================
+
+# Keys outside the UnifiedState schema (e.g. subsystem outputs such as
+# "review_assignments") live in the record's `_extra` dict, as they would in a state dict
+
+def _record_getitem(self, key: str) -> Any:
+    if key in _RECORD_FIELD_SET:
+        return getattr(self, key)
+    try:
+        return self._extra[key]
+    except KeyError:
+        raise KeyError(key) from None
+
+def _record_setitem(self, key: str, value: Any):
+    if key in _RECORD_FIELD_SET:
+        setattr(self, key, value)
+    else:
+        self._extra[key] = value
+
+def _record_get(self, key: str, default: Any = None) -> Any:
+    if key not in _RECORD_FIELD_SET:
+        return self._extra.get(key, default)
+    value = getattr(self, key)
+    return default if value is None else value
+
+def _record_contains(self, key: str) -> bool:
+    if key not in _RECORD_FIELD_SET:
+        return key in self._extra
+    # Unset (None) fields behave like keys missing from a total=False TypedDict
+    return getattr(self, key) is not None
+
+def _record_update(self, other: Any = (), **kwargs):
+    items = other.items() if isinstance(other, Mapping) else other
+    for key, value in itertools.chain(items, kwargs.items()):
+        _record_setitem(self, key, value)
+
+def _record_to_dict(self) -> Dict[str, Any]:
+    """UnifiedState dict of the fields that are set, sharing their containers."""
+    state = {
+        name: value for name in _RECORD_FIELD_NAMES
+        if (value := getattr(self, name)) is not None
+    }
+    state.update(self._extra)
+    return state
+
+def _make_state_record() -> type:
+    """
+    Generate a slotted dataclass with one attribute per UnifiedState field.
+    
+    Returns:
+        Dataclass whose unset fields are None (flags default to the
+        state template values), with dict-style shims for existing callers;
+        non-schema keys are kept in `_extra`
+    """
+    record_fields = [
+        (key, Optional[annotation], dataclass_field(default=_STATE_TEMPLATE.get(key)))
+        for key, annotation in UnifiedState.__annotations__.items()
+    ]
+    record_fields.append(("_extra", Dict[str, Any], dataclass_field(default_factory=dict, repr=False)))
+    record = make_dataclass(
+        "UnifiedStateRecord",
+        record_fields,
+        slots=True,
+        namespace={
+            '__doc__': "UnifiedState with attribute access; also indexable like the state dict.",
+            '__getitem__': _record_getitem,
+            '__setitem__': _record_setitem,
+            '__contains__': _record_contains,
+            'get': _record_get,
+            'update': _record_update,
+            'to_dict': _record_to_dict,
+        }
+    )
+    record.__module__ = __name__
+    return record
+
+UnifiedStateRecord = _make_state_record()
+_RECORD_FIELD_NAMES = tuple(f.name for f in dataclass_fields(UnifiedStateRecord) if f.name != "_extra")
+_RECORD_FIELD_SET = frozenset(_RECORD_FIELD_NAMES)
+
 # ===============================
 # UNIFIED STATE MANAGER
 # ===============================
@@ -277,31 +636,30 @@ class UnifiedStateManager:
         Returns:
             Initialized unified state
         """
-        initial_state = UnifiedState(
-            session_id=session_id,
-            messages=[],
-            service_statuses={},
-            service_results={},
-            service_errors={},
-            execution_history=[],
-            chunks=[],
-            cypher_queries=[],
-            validation_errors=[],
-            errors=[],
-            state_validated=False,
-            cross_system_compatibility=False,
-            required_fields_present=False,
-            service_compatibility_checked=False,
-            facd_approved=False,
-            fccs_approved=False,
-            ffcs_approved=False,
-            **kwargs
-        )
+        initial_state = _new_state()
+        initial_state["session_id"] = session_id
+        initial_state.update(kwargs)
         
         logger.info(f"Created initial state for session: {session_id}")
         return initial_state
     
-    def validate_state(self, state: UnifiedState) -> Dict[str, Any]:
+    def create_state_record(self, session_id: str, **kwargs) -> UnifiedStateRecord:
+        """
+        Create initial state as a slotted record for attribute access.
+        
+        Args:
+            session_id: Unique session identifier
+            **kwargs: Additional initial state values (must be UnifiedState fields)
+            
+        Returns:
+            UnifiedStateRecord with the same defaults as `create_initial_state`
+        """
+        record = UnifiedStateRecord(**_new_state())
+        record.session_id = session_id
+        record.update(kwargs)
+        return record
+    
+    def validate_state(self, state: UnifiedState) -> ValidationResult:
         """
         Validate unified state for completeness and consistency.
         
@@ -309,48 +667,43 @@ class UnifiedStateManager:
             state: State to validate
             
         Returns:
-            Validation result dictionary
+            Validation result (also indexable like the previous result dict)
         """
-        validation_result = {
-            "valid": True,
-            "errors": [],
-            "warnings": [],
-            "missing_fields": [],
-            "inconsistent_fields": []
-        }
+        validation_result = ValidationResult()
         
-        # Check required fields
-        required_fields = ["session_id"]
-        for field in required_fields:
-            if field not in state or state[field] is None:
-                validation_result["missing_fields"].append(field)
-                validation_result["valid"] = False
-        
-        # Check subsystem-specific requirements
-        if state.get("subsystem"):
-            subsystem = state["subsystem"]
-            if subsystem == SubsystemType.CONTENT:
-                if not state.get("course_id"):
-                    validation_result["warnings"].append("Content subsystem should have course_id")
+        if isinstance(state, UnifiedStateRecord):
+            # Slotted record: plain attribute loads, no dict lookups
+            for field in _REQUIRED_FIELDS:
+                if getattr(state, field) is None:
+                    validation_result.missing_fields.append(field)
+                    validation_result.valid = False
+            for approved_field, data_field, message in _APPROVAL_STAGES:
+                if getattr(state, approved_field) and not getattr(state, data_field):
+                    validation_result.inconsistent_fields.append(message)
+        else:
+            # Check required fields
+            for field in _REQUIRED_FIELDS:
+                if state.get(field) is None:
+                    validation_result.missing_fields.append(field)
+                    validation_result.valid = False
             
-            elif subsystem == SubsystemType.LEARNER:
-                if not state.get("learner_id"):
-                    validation_result["warnings"].append("Learner subsystem should have learner_id")
-        
-        # Check faculty approval consistency
-        if state.get("facd_approved") and not state.get("facd"):
-            validation_result["inconsistent_fields"].append("facd_approved=True but no facd data")
+            # Check faculty approval consistency
+            for approved_field, data_field, message in _APPROVAL_STAGES:
+                if state.get(approved_field) and not state.get(data_field):
+                    validation_result.inconsistent_fields.append(message)
         
-        if state.get("fccs_approved") and not state.get("fccs"):
-            validation_result["inconsistent_fields"].append("fccs_approved=True but no fccs data")
+        # Check subsystem-specific requirements (soft warnings)
+        subsystem = state.get("subsystem")
+        if subsystem in _SUBSYSTEM_ID_FIELDS:
+            id_field, warning = _SUBSYSTEM_ID_FIELDS[subsystem]
+            if not state.get(id_field):
+                validation_result.warnings.append(warning)
         
-        if state.get("ffcs_approved") and not state.get("ffcs"):
-            validation_result["inconsistent_fields"].append("ffcs_approved=True but no ffcs data")
-        
-        # Update state validation status
-        state["state_validated"] = validation_result["valid"]
-        state["validation_errors"] = validation_result["errors"]
-        state["required_fields_present"] = len(validation_result["missing_fields"]) == 0
+        with _state_lock(state):
+            # Update state validation status (copy: the state must not share the result's list)
+            state["state_validated"] = validation_result.valid
+            state["validation_errors"] = list(validation_result.errors)
+            state["required_fields_present"] = not validation_result.missing_fields
         
         return validation_result
     
@@ -369,34 +722,61 @@ class UnifiedStateManager:
         Returns:
             Updated state
         """
-        if "service_statuses" not in state:
-            state["service_statuses"] = {}
-        if "service_results" not in state:
-            state["service_results"] = {}
-        if "service_errors" not in state:
-            state["service_errors"] = {}
-        
-        state["service_statuses"][service_id] = status
-        
-        if result:
-            state["service_results"][service_id] = result
-        
-        if error:
-            state["service_errors"][service_id] = error
-        
-        # Add to execution history
-        if "execution_history" not in state:
-            state["execution_history"] = []
+        with _state_lock(state):
+            if "service_statuses" not in state:
+                state["service_statuses"] = {}
+            if "service_results" not in state:
+                state["service_results"] = {}
+            if "service_errors" not in state:
+                state["service_errors"] = {}
+            
+            state["service_statuses"][service_id] = status
+            
+            if result:
+                state["service_results"][service_id] = result
+            
+            if error:
+                state["service_errors"][service_id] = error
+            
+            # Add to execution history (seeded by create_initial_state; created here for foreign states)
+            history = state.get("execution_history")
+            if history is None:
+                history = state["execution_history"] = []
+            
+            history.append({
+                "timestamp": time.time_ns(),  # epoch nanoseconds
+                "service_id": service_id,
+                "status": status,
+                "result": result,
+                "error": error
+            })
+            # Trim in place: the history stays a plain (JSON-serializable) list
+            if len(history) > EXECUTION_HISTORY_SIZE:
+                del history[:-EXECUTION_HISTORY_SIZE]
+        return state
+    
+    def get_service_records(self, state: UnifiedState) -> Dict[str, ServiceRecord]:
+        """
+        Gather each service's status, result and error into one record.
         
-        state["execution_history"].append({
-            "timestamp": "now",  # TODO: Add proper timestamp
-            "service_id": service_id,
-            "status": status,
-            "result": result,
-            "error": error
-        })
+        The state keeps the three plain dicts (so it stays JSON/checkpoint
+        serializable); this builds the combined table for readers that scan
+        all services, e.g. to find every errored one.
         
-        return state
+        Args:
+            state: Unified state
+            
+        Returns:
+            service_id -> ServiceRecord snapshot (changes are not written back)
+        """
+        with _state_lock(state):
+            statuses = state.get("service_statuses") or {}
+            results = state.get("service_results") or {}
+            errors = state.get("service_errors") or {}
+            return {
+                service_id: ServiceRecord(statuses.get(service_id), results.get(service_id), errors.get(service_id))
+                for service_id in dict.fromkeys(itertools.chain(statuses, results, errors))
+            }
     
     def get_subsystem_state(self, state: UnifiedState, subsystem: SubsystemType) -> Dict[str, Any]:
         """
@@ -407,105 +787,69 @@ class UnifiedStateManager:
             subsystem: Target subsystem
             
         Returns:
-            Subsystem-specific state dictionary
+            Subsystem-specific state (a new dict the caller may modify)
         """
-        if subsystem == SubsystemType.CONTENT:
-            return {
-                "course_id": state.get("course_id"),
-                "faculty_id": state.get("faculty_id"),
-                "upload_type": state.get("upload_type"),
-                "file_path": state.get("file_path"),
-                "es_index": state.get("es_index"),
-                "chunks": state.get("chunks", []),
-                "content_metadata": state.get("content_metadata", {}),
-                "knowledge_graph": state.get("knowledge_graph"),
-                "facd": state.get("facd"),
-                "fccs": state.get("fccs"),
-                "ffcs": state.get("ffcs")
-            }
-        
-        elif subsystem == SubsystemType.LEARNER:
-            return {
-                "learner_id": state.get("learner_id"),
-                "course_id": state.get("course_id"),
-                "learner_context": state.get("learner_context"),
-                "learning_preferences": state.get("learning_preferences"),
-                "personalized_learning_tree": state.get("personalized_learning_tree"),
-                "query_strategy": state.get("query_strategy"),
-                "query_results": state.get("query_results")
-            }
-        
-        elif subsystem == SubsystemType.SME:
-            return {
-                "sme_id": state.get("sme_id"),
-                "course_id": state.get("course_id"),
-                "review_assignments": state.get("sme_assignments", []),
-                "review_status": state.get("review_status"),
-                "expert_feedback": state.get("expert_feedback", [])
-            }
-        
-        elif subsystem == SubsystemType.ANALYTICS:
-            return {
-                "course_id": state.get("course_id"),
-                "learner_id": state.get("learner_id"),
-                "learning_metrics": state.get("learning_metrics", {}),
-                "engagement_data": state.get("engagement_data", []),
-                "performance_indicators": state.get("performance_indicators", {})
-            }
+        # Extract under the state lock so a concurrent update cannot tear it
+        with _state_lock(state):
+            return _SUBSYSTEM_EXTRACTORS.get(subsystem, _extract_nothing)(state)
+    
+    def get_subsystem_view(self, state: UnifiedState, subsystem: SubsystemType):
+        """
+        Extract subsystem state as a slotted dataclass for attribute access.
         
-        return {}
+        Args:
+            state: Unified state
+            subsystem: Target subsystem
+            
+        Returns:
+            ContentState, LearnerState, SMEState or AnalyticsState instance
+        """
+        return SUBSYSTEM_STATE_VIEWS[subsystem](**self.get_subsystem_state(state, subsystem))
     
     def merge_subsystem_state(self, state: UnifiedState, subsystem: SubsystemType, 
-                            subsystem_state: Dict[str, Any]) -> UnifiedState:
+                            subsystem_state: Dict[str, Any], none_free: bool = False) -> UnifiedState:
         """
         Merge subsystem-specific state back into unified state.
         
         Args:
             state: Current unified state
             subsystem: Source subsystem
-            subsystem_state: Subsystem-specific state to merge
+            subsystem_state: Subsystem-specific state (dict or state view) to merge
+            none_free: Caller guarantees no value is None, so skip filtering
             
         Returns:
             Updated unified state
         """
-        # Update state with subsystem data
-        for key, value in subsystem_state.items():
-            if value is not None:
-                state[key] = value
+        if is_dataclass(subsystem_state):
+            subsystem_state = subsystem_state.to_dict()
         
+        with _state_lock(state):
+            # Update state with subsystem data, skipping None values
+            if none_free:
+                state.update(subsystem_state)
+            else:
+                state.update({key: value for key, value in subsystem_state.items() if value is not None})
         return state
     
-    def bridge_to_agent_state(self, state: UnifiedState, agent_type: str = "stage1") -> Dict[str, Any]:
+    def bridge_to_agent_state(self, state: UnifiedState, agent_type: str = "stage1",
+                              mutable: bool = False) -> Mapping[str, Any]:
         """
         Bridge unified state to LangChain agent state format.
         
         Args:
             state: Unified state
             agent_type: Type of agent ("stage1", "stage2", etc.)
+            mutable: Return a materialized dict the caller may modify
             
         Returns:
-            Agent-compatible state dictionary
+            Read-only view of the agent's fields over the unified state
+            (or a dict copy when `mutable` is set)
         """
-        agent_state = {
-            "messages": state.get("messages", []),
-            "session_id": state.get("session_id"),
-            "course_id": state.get("course_id")
-        }
-        
-        # Add agent-specific data
-        if agent_type == "stage1":
-            agent_state.update({
-                "chunks": state.get("chunks", []),
-                "content_metadata": state.get("content_metadata", {}),
-                "facd": state.get("facd")
-            })
-        elif agent_type == "stage2":
-            agent_state.update({
-                "facd": state.get("facd"),
-                "fccs": state.get("fccs")
-            })
-        
-        return agent_state
+        view = _AgentView(state, _AGENT_SCHEMAS.get(agent_type, _AGENT_BASE_FIELDS))
+        if not mutable:
+            return view
+        with _state_lock(state):
+            return dict(view)
     
     def bridge_from_agent_state(self, agent_state: Dict[str, Any], unified_state: UnifiedState) -> UnifiedState:
         """
@@ -518,30 +862,63 @@ class UnifiedStateManager:
         Returns:
             Updated unified state
         """
-        # Update messages
-        if "messages" in agent_state:
-            unified_state["messages"] = agent_state["messages"]
-        
-        # Update other fields
-        for key, value in agent_state.items():
-            if key != "messages" and value is not None:
-                unified_state[key] = value
-        
+        with _state_lock(unified_state):
+            # Update messages
+            if "messages" in agent_state:
+                unified_state["messages"] = agent_state["messages"]
+            
+            # Update other fields in one update() call, skipping None values
+            unified_state.update({
+                key: value for key, value in agent_state.items()
+                if value is not None and key != "messages"
+            })
         return unified_state
 
-# Global state manager instance
-state_manager = UnifiedStateManager()
+# One state manager per thread: no manager instance is shared between workers
+_local_managers = threading.local()
+
+def _get_manager() -> UnifiedStateManager:
+    """Get the calling thread's state manager, creating it on first use."""
+    manager = getattr(_local_managers, "manager", None)
+    if manager is None:
+        manager = _local_managers.manager = UnifiedStateManager()
+    return manager
 
 # Convenience functions for backward compatibility
 def create_unified_state(session_id: str, **kwargs) -> UnifiedState:
     """Convenience function for creating unified state."""
-    return state_manager.create_initial_state(session_id, **kwargs)
+    return _get_manager().create_initial_state(session_id, **kwargs)
 
 def validate_unified_state(state: UnifiedState) -> Dict[str, Any]:
-    """Convenience function for validating unified state."""
-    return state_manager.validate_state(state)
+    """Convenience function for validating unified state; returns a plain result dict."""
+    return _get_manager().validate_state(state).to_dict()
+
+def get_status_counts(state: UnifiedState) -> Dict[str, Dict[str, int]]:
+    """
+    Count execution history entries per service and status.
+    
+    Args:
+        state: Unified state
+        
+    Returns:
+        service_id -> {status value: count}
+    """
+    with _state_lock(state):
+        pairs = Counter(
+            (entry["service_id"], getattr(entry["status"], "value", entry["status"]))
+            for entry in state.get("execution_history", ())
+        )
+    
+    counts: Dict[str, Dict[str, int]] = {}
+    for (service_id, status), n in pairs.items():
+        counts.setdefault(service_id, {})[status] = n
+    return counts
+
+def snapshot_history(state: UnifiedState) -> List[Dict[str, Any]]:
+    """Copy of a state's execution history as a list, oldest entry first."""
+    return list(state.get("execution_history", ()))
 
 def update_service_status(state: UnifiedState, service_id: str, status: ServiceStatus, 
                          result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> UnifiedState:
     """Convenience function for updating service status."""
-    return state_manager.update_service_status(state, service_id, status, result, error) 
\ No newline at end of file
+    return _get_manager().update_service_status(state, service_id, status, result, error) 
\ No newline at end of file